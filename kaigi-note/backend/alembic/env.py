@@ -7,16 +7,19 @@ from dotenv import load_dotenv
 
 # model の MetaData
 from app.core.database import Base
-from app.models import User, Event, EventParticipant  # noqa
+from app.core.migrations import include_name
+from app.models import (  # noqa
+    User, Event, EventParticipant, NotificationOutbox, RevokedToken, ReplicaHeartbeat
+)
 
 load_dotenv()
 config = context.config
 if os.getenv("DATABASE_URL"):
     config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL"))
 
-# logging
+# logging; keep the app's loggers when run from app.core.migrations
 if config.config_file_name:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 target_metadata = Base.metadata
 
@@ -27,12 +30,29 @@ def run_migrations_offline():
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection):
+    context.configure(
+        connection=connection, target_metadata=target_metadata,
+        include_name=include_name,
     )
     with context.begin_transaction():
         context.run_migrations()
 
 
 def run_migrations_online():
+    # app.core.migrations.upgrade_database passes the connection that holds
+    # its advisory lock
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
     # ① create_engine で同期エンジン
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
@@ -41,11 +61,7 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:  # ←同期
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-        with context.begin_transaction():
-            context.run_migrations()
+        do_run_migrations(connection)
 
 
 if context.is_offline_mode():
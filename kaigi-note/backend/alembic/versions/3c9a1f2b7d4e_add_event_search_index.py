@@ -0,0 +1,64 @@
+"""Add event keyword search index
+
+Revision ID: 3c9a1f2b7d4e
+Revises: f877b1c1e047
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import sqlite3
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9a1f2b7d4e'
+down_revision = 'f877b1c1e047'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Trigram GIN index: substring search that works for Japanese text
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_events_search_trgm ON events USING gin "
+            "((coalesce(title, '') || ' ' || coalesce(place, '') || ' ' || coalesce(content, ''))"
+            " gin_trgm_ops)"
+        )
+    elif dialect == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0):
+        # FTS5 with the trigram tokenizer, kept in sync by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+            "title, place, content, content='events', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+            "INSERT INTO events_fts(rowid, title, place, content) "
+            "VALUES (new.id, new.title, new.place, new.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, title, place, content) "
+            "VALUES ('delete', old.id, old.title, old.place, old.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, place, content ON events BEGIN "
+            "INSERT INTO events_fts(events_fts, rowid, title, place, content) "
+            "VALUES ('delete', old.id, old.title, old.place, old.content); "
+            "INSERT INTO events_fts(rowid, title, place, content) "
+            "VALUES (new.id, new.title, new.place, new.content); END"
+        )
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_events_search_trgm")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS events_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_ai")
+        op.execute("DROP TABLE IF EXISTS events_fts")
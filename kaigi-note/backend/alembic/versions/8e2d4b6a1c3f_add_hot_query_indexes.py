@@ -0,0 +1,27 @@
+"""Add indexes for the hot router queries
+
+Revision ID: 8e2d4b6a1c3f
+Revises: 3c9a1f2b7d4e
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2d4b6a1c3f'
+down_revision = '3c9a1f2b7d4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_events_start_time_id', 'events', ['start_time', 'id'])
+    op.create_index('ix_events_status_start_time_id', 'events', ['status', 'start_time', 'id'])
+    op.create_index(op.f('ix_event_participants_user_id'), 'event_participants', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_event_participants_user_id'), table_name='event_participants')
+    op.drop_index('ix_events_status_start_time_id', table_name='events')
+    op.drop_index('ix_events_start_time_id', table_name='events')
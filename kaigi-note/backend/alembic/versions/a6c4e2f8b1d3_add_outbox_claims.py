@@ -0,0 +1,25 @@
+"""Add outbox claims
+
+Revision ID: a6c4e2f8b1d3
+Revises: e8b3f1a7c2d5
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c4e2f8b1d3'
+down_revision = 'e8b3f1a7c2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox',
+                  sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('notification_outbox', 'claimed_until')
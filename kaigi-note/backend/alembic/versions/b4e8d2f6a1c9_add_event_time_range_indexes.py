@@ -0,0 +1,31 @@
+"""Add event date-range indexes
+
+Revision ID: b4e8d2f6a1c9
+Revises: 9d1f3a5c7e2b
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8d2f6a1c9'
+down_revision = '9d1f3a5c7e2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_events_start_time_end_time', 'events', ['start_time', 'end_time'])
+    if op.get_bind().dialect.name == 'postgresql':
+        # GiST over the event's time range, queried with the && operator
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_events_time_range ON events USING gist "
+            "(tstzrange(start_time, greatest(start_time, end_time), '[]'))"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_events_time_range")
+    op.drop_index('ix_events_start_time_end_time', table_name='events')
@@ -0,0 +1,35 @@
+"""Add participant_count and waitlist status
+
+Revision ID: c7a3e9b1d5f2
+Revises: b4e8d2f6a1c9
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a3e9b1d5f2'
+down_revision = 'b4e8d2f6a1c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('participant_count', sa.Integer(),
+                                      nullable=False, server_default='0'))
+    op.add_column('event_participants', sa.Column('enrollment_status', sa.String(length=20),
+                                                  nullable=False, server_default='confirmed'))
+    # Everyone enrolled so far is confirmed, even past max_participants,
+    # which was never enforced before
+    op.execute(
+        "UPDATE events SET participant_count = ("
+        "SELECT count(*) FROM event_participants "
+        "WHERE event_participants.event_id = events.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('event_participants', 'enrollment_status')
+    op.drop_column('events', 'participant_count')
@@ -0,0 +1,29 @@
+"""Add row versions
+
+Revision ID: e8b3f1a7c2d5
+Revises: d2f6b8a4c1e7
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3f1a7c2d5'
+down_revision = 'd2f6b8a4c1e7'
+branch_labels = None
+depends_on = None
+
+TABLES = ('users', 'events', 'event_participants')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(),
+                                       nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_column(table, 'version')
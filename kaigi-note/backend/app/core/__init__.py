@@ -1,12 +1,32 @@
-from .config import settings
-from .database import get_db, Base, engine, SessionLocal
-from .security import verify_password, get_password_hash, create_access_token
-from .deps import get_current_user
+from importlib import import_module
+
+# Exports are resolved on first access so that importing a submodule
+# (e.g. app.core.database from the models or Alembic) does not pull in
+# passlib/jose or create the database engine
+_EXPORTS = {
+    "settings": ".config",
+    "get_db": ".database",
+    "get_async_db": ".database",
+    "Base": ".database",
+    "engine": ".database",
+    "async_engine": ".database",
+    "SessionLocal": ".database",
+    "AsyncSessionLocal": ".database",
+    "verify_password": ".security",
+    "get_password_hash": ".security",
+    "hash_password_async": ".security",
+    "verify_password_async": ".security",
+    "create_access_token": ".security",
+    "get_current_user": ".deps",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, __name__), name)
+
 
 # Export all core modules
-__all__ = [
-    "settings",
-    "get_db", "Base", "engine", "SessionLocal",
-    "verify_password", "get_password_hash", "create_access_token",
-    "get_current_user"
-]
+__all__ = list(_EXPORTS)
@@ -13,12 +13,133 @@ class Settings(BaseSettings):
         "SECRET_KEY", "your-secret-key-for-development")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    # Revoked token ids are synced from the database into each worker;
+    # a logout on one worker takes up to this long to reach the others
+    REVOCATION_SYNC_INTERVAL: float = 2.0
+    # Seconds between deletions of expired revocations
+    REVOCATION_PRUNE_INTERVAL: float = 300.0
+
+    # Password hashing settings
+    # Changing BCRYPT_ROUNDS rehashes each password on its next login
+    BCRYPT_ROUNDS: int = 12
+    # Size of the dedicated hashing pool; 0 means one worker per CPU
+    PASSWORD_HASH_WORKERS: int = 0
+    # Hash requests allowed in flight or queued before failing with 503
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Hash in worker processes instead of threads
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+
+    # Rate limits for login and registration, applied before any bcrypt
+    # work; each is a token bucket of BURST requests refilled at RATE per
+    # minute, per client IP and (for login) per account. Buckets live in
+    # each worker process and are not shared, so with WEB_CONCURRENCY
+    # workers (and per machine) a client gets up to that many times the
+    # limit; divide the settings accordingly
+    RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_PER_IP_PER_MINUTE: float = 30.0
+    LOGIN_BURST_PER_IP: int = 10
+    LOGIN_RATE_PER_ACCOUNT_PER_MINUTE: float = 5.0
+    LOGIN_BURST_PER_ACCOUNT: int = 5
+    REGISTER_RATE_PER_IP_PER_MINUTE: float = 5.0
+    REGISTER_BURST_PER_IP: int = 5
+    # Keys tracked per limiter; least recently used ones are evicted
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # Header carrying the client IP behind a proxy, e.g. Fly-Client-IP on
+    # Fly.io (set by the Dockerfile); empty uses the socket peer address,
+    # which behind a proxy puts every client in one bucket. Only set it
+    # when a proxy always sets the header. For a list such as
+    # X-Forwarded-For the last entry (the one the proxy appended) is used,
+    # since clients can send their own
+    RATE_LIMIT_CLIENT_IP_HEADER: str = ""
 
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./kaigi_note.db")
+    # What the app does to the schema on startup: "create" runs create_all
+    # (local development), "check" only verifies the database is at the
+    # Alembic head and refuses to start otherwise, "none" skips both
+    DB_STARTUP_MODE: str = "create"
+
+    # Production server (python -m app.serve). WEB_CONCURRENCY workers, or
+    # one per available CPU when 0; every worker has its own connection
+    # pools, so size DB_POOL_SIZE accordingly. On a single CPU, setting
+    # WEB_CONCURRENCY=2 keeps one worker serving while the other is
+    # recycled, at the cost of a second copy of the app in memory. A worker is
+    # replaced after WEB_MAX_REQUESTS requests plus up to
+    # WEB_MAX_REQUESTS_JITTER more (0 never replaces it), which caps memory
+    # growth. On SIGTERM, in-flight requests get WEB_GRACEFUL_TIMEOUT
+    # seconds to finish. MIGRATE_ON_START applies Alembic migrations first
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 0
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    WEB_KEEPALIVE: int = 5
+    MIGRATE_ON_START: bool = True
+
+    # Connection pool settings (SQLite file databases use the size, overflow
+    # and timeout only)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds before a pooled connection is replaced; -1 disables recycling
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Optional read replica for safe GET endpoints; empty sends all reads to
+    # DATABASE_URL. Replication lag is measured every REPLICA_CHECK_INTERVAL
+    # seconds from a heartbeat row, and reads fall back to the primary while
+    # it exceeds REPLICA_MAX_LAG_SECONDS. A user's reads also go to the
+    # primary for READ_YOUR_WRITES_SECONDS after they write; keep that above
+    # the maximum lag so they always see their own changes. Each worker
+    # remembers up to READ_YOUR_WRITES_MAX_USERS recent writers; size it
+    # for the users writing within READ_YOUR_WRITES_SECONDS at peak, as the
+    # oldest are evicted first and then only the X-Consistent-Read-Until
+    # header their client echoes keeps them on the primary
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    REPLICA_CHECK_INTERVAL: float = 1.0
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+    READ_YOUR_WRITES_MAX_USERS: int = 10000
+
+    # Authenticated user cache; entries written by another worker can be
+    # stale for up to USER_CACHE_TTL_SECONDS
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Per-route latency and SQL metrics, served on /metrics
+    METRICS_ENABLED: bool = True
+
+    # N+1 / slow-query detector for development and staging: warn when a
+    # request runs one statement more than QUERY_TRACKER_REPEAT_THRESHOLD
+    # times or spends over QUERY_TRACKER_SQL_BUDGET_MS in SQL; raise
+    # instead when QUERY_TRACKER_RAISE (test mode)
+    QUERY_TRACKER_ENABLED: bool = False
+    QUERY_TRACKER_REPEAT_THRESHOLD: int = 5
+    QUERY_TRACKER_SQL_BUDGET_MS: float = 200.0
+    QUERY_TRACKER_RAISE: bool = False
+
+    # Server-sent change feed (GET /api/events/stream). Idle streams get a
+    # comment every STREAM_KEEPALIVE_SECONDS; a client reconnecting to the
+    # same worker resumes from the last STREAM_HISTORY_SIZE changes, and is
+    # told to refetch otherwise. Beyond STREAM_MAX_SUBSCRIBERS streams per
+    # worker new ones get 503. STREAM_RETRY_MS is the client reconnect delay
+    STREAM_KEEPALIVE_SECONDS: float = 15.0
+    STREAM_HISTORY_SIZE: int = 256
+    STREAM_MAX_SUBSCRIBERS: int = 5000
+    STREAM_RETRY_MS: int = 3000
 
     # Discord webhook URL
     DISCORD_WEBHOOK_URL: str = os.getenv("DISCORD_WEBHOOK_URL", "")
+    # Outbox dispatcher: seconds between polls, and retry policy
+    DISCORD_POLL_INTERVAL: float = 5.0
+    DISCORD_MAX_ATTEMPTS: int = 10
+    DISCORD_MAX_BACKOFF: float = 600.0
+    # Sent notifications are deleted after DISCORD_SENT_RETENTION seconds,
+    # checked every DISCORD_PRUNE_INTERVAL seconds
+    DISCORD_SENT_RETENTION: float = 7 * 24 * 3600.0
+    DISCORD_PRUNE_INTERVAL: float = 3600.0
 
     class Config:
         case_sensitive = True
@@ -1,21 +1,258 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import settings
+from .metrics import instrument_engine
+from .query_tracker import install_query_tracker
 
 # Database URL
 # For local development, use SQLite
-SQLALCHEMY_DATABASE_URL = os.getenv(
-    "DATABASE_URL", "sqlite:///./kaigi_note.db")
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+# Async drivers for each supported backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver."""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if drivername is None:
+        return url
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+class PoolStats:
+    """Checkout wait-time counters for a connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_seconds": self.wait_total,
+                "wait_max_seconds": self.wait_max,
+            }
+
+
+class _TimedPoolMixin:
+    """Record how long callers wait for a connection from the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        # Keep counters across pool recreation (e.g. after engine.dispose())
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    """Build create_engine keyword arguments from the pool settings."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        options = {"connect_args": {"check_same_thread": False}}
+        if parsed.database and parsed.database != ":memory:":
+            # aiosqlite would otherwise use NullPool, opening a connection per
+            # checkout without limit; a burst of writers then fails on
+            # SQLite's lock timeout instead of queueing for a connection
+            options.update(
+                poolclass=poolclass,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+            )
+        return options
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _instrument(sync_engine) -> None:
+    if settings.METRICS_ENABLED:
+        instrument_engine(sync_engine)
+    if settings.QUERY_TRACKER_ENABLED:
+        install_query_tracker(sync_engine)
+
+
+# Engines are created on first use rather than at import, so importing the
+# models (Alembic, scripts, worker boot) never touches the database
+_engine = None
+_async_engine = None
+_read_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the sync engine, creating it on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    SQLALCHEMY_DATABASE_URL,
+                    **_engine_options(SQLALCHEMY_DATABASE_URL, TimedQueuePool)
+                )
+                _instrument(_engine)
+    return _engine
+
+
+def get_async_engine():
+    """Return the async engine (asyncpg on PostgreSQL, aiosqlite on SQLite),
+    creating it on first call."""
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    to_async_url(SQLALCHEMY_DATABASE_URL),
+                    **_engine_options(SQLALCHEMY_DATABASE_URL, TimedAsyncAdaptedQueuePool)
+                )
+                _instrument(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_read_engine():
+    """Return the async engine for the read replica (DATABASE_READ_URL),
+    creating it on first call, or None when no replica is configured."""
+    global _read_engine
+    if _read_engine is None and settings.DATABASE_READ_URL:
+        with _engine_lock:
+            if _read_engine is None:
+                _read_engine = create_async_engine(
+                    to_async_url(settings.DATABASE_READ_URL),
+                    **_engine_options(settings.DATABASE_READ_URL, TimedAsyncAdaptedQueuePool)
+                )
+                _instrument(_read_engine.sync_engine)
+    return _read_engine
+
+
+def __getattr__(name):
+    # Keep `from app.core.database import engine` working without
+    # creating the engine at import time
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_pool_status() -> dict:
+    """Return live connection pool metrics for the engines created so far.
+
+    Engines that have not been used yet are left out rather than created
+    just to be reported on.
+    """
+    status = {}
+    engines = [("sync", _engine), ("async", _async_engine), ("read", _read_engine)]
+    for name, bound in engines:
+        if bound is None:
+            continue
+        if not hasattr(bound, "pool"):
+            bound = bound.sync_engine
+        pool = bound.pool
+        entry = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        stats = getattr(pool, "stats", None)
+        if stats is not None:
+            entry.update(stats.snapshot())
+        status[name] = entry
+    return status
+
+
+class LazySession(Session):
+    """Session bound to the sync engine, resolved when first needed."""
+
+    def get_bind(self, mapper=None, **kw):
+        return get_engine()
+
+
+class LazyAsyncBindSession(Session):
+    """Sync half of an AsyncSession, bound to the async engine when first needed."""
+
+    def get_bind(self, mapper=None, **kw):
+        return get_async_engine().sync_engine
+
+
+class LazyAsyncReadBindSession(Session):
+    """Sync half of an AsyncSession, bound to the read replica engine."""
+
+    def get_bind(self, mapper=None, **kw):
+        return get_read_engine().sync_engine
 
-# Create engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={
-        "check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
-)
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=LazySession, autocommit=False, autoflush=False)
+
+# Create async session factory
+# expire_on_commit is disabled so attributes stay readable after commit
+# without an implicit (and, in async, forbidden) lazy reload
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=LazyAsyncBindSession,
+    autoflush=False, expire_on_commit=False)
+
+# Read-only sessions on the replica; see app.core.deps.get_read_db
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=LazyAsyncReadBindSession,
+    autoflush=False, expire_on_commit=False)
 
 # Create base class for models
 Base = declarative_base()
@@ -29,3 +266,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get async DB session
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,20 +1,39 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 
-from .database import get_db
-from .security import SECRET_KEY, ALGORITHM
+from .cache import TTLCache
+from .config import settings
+from .database import AsyncReadSessionLocal, get_async_db
+from .replica import CONSISTENT_READ_HEADER, DOWN, ROUTE_REPLICA, replica_monitor
+from .revocation import revocation_list
+from .security import SECRET_KEY, ALGORITHM, REFRESH_TOKEN
 from ..models.user import User
 from ..schemas.user import TokenPayload
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+# Same, but yields None instead of failing when no token is sent
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
+# Methods that never write; any other request by a user pins their reads
+# to the primary for a while
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+# Authenticated users keyed by id; invalidate on every write to a user row
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+async def get_current_user(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme),
 ) -> User:
     """Get the current user from the token."""
     try:
@@ -22,22 +41,33 @@ def get_current_user(
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         token_data = TokenPayload(**payload)
 
-        # Check if token has user ID
-        if token_data.sub is None:
+        # Check if token has user ID, and is an access token that has not
+        # been revoked (an in-memory lookup, no query)
+        if (token_data.sub is None or token_data.type == REFRESH_TOKEN
+                or (token_data.jti and revocation_list.is_revoked(token_data.jti))):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # Get user from database
-        user = db.query(User).filter(User.id == token_data.sub).first()
+        # Get user from cache, falling back to the database
+        user = user_cache.get(token_data.sub)
         if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            result = await db.execute(select(User).where(User.id == token_data.sub))
+            user = result.scalars().first()
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            # Detach so the cached row is never shared with another session
+            db.expunge(user)
+            user_cache.set(user.id, user)
+
+        if settings.DATABASE_READ_URL and request.method not in SAFE_METHODS:
+            response.headers[CONSISTENT_READ_HEADER] = replica_monitor.note_write(user.id)
 
         return user
     except (JWTError, ValidationError):
@@ -46,3 +76,38 @@ def get_current_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def get_read_db(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Session for read-only endpoints: the replica when it is configured,
+    healthy and the user has not written recently, else the primary
+    session already used to authenticate the request."""
+    if not settings.DATABASE_READ_URL:
+        yield db
+        return
+
+    route = replica_monitor.route(
+        current_user.id, request.headers.get(CONSISTENT_READ_HEADER))
+    if route == ROUTE_REPLICA:
+        read_db = AsyncReadSessionLocal()
+        try:
+            # Connect now so an unreachable replica falls back to the primary
+            await read_db.connection()
+        except (OSError, SQLAlchemyError):
+            await read_db.close()
+            replica_monitor.mark_down()
+            route = f"replica_{DOWN}"
+        else:
+            replica_monitor.record(route)
+            try:
+                yield read_db
+            finally:
+                await read_db.close()
+            return
+
+    replica_monitor.record(route)
+    yield db
@@ -0,0 +1,202 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Label for requests that matched no route, so scanners cannot blow up
+# the number of series
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three additions."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """SQL work done on behalf of one request (or of background tasks)."""
+    __slots__ = ("queries", "sql_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "queries", "sql_seconds", "responses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = Histogram(LATENCY_BUCKETS)
+        self.responses: Dict[int, int] = {}
+
+
+_current_request: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_request_metrics", default=None)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current_request.get()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+class MetricsRegistry:
+    """Per-route request and SQL metrics.
+
+    Only updated from the event loop (by MetricsMiddleware), so no locking
+    is needed; background SQL is accumulated separately.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self.background = RequestMetrics()
+
+    def record(self, method: str, route: str, status_code: int, seconds: float,
+               request: RequestMetrics) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.queries.observe(request.queries)
+        metrics.sql_seconds.observe(request.sql_seconds)
+        metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+
+    def clear(self) -> None:
+        self.routes.clear()
+        self.background = RequestMetrics()
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = [
+            "# HELP kaigi_http_requests_total Responses sent, by route and status.",
+            "# TYPE kaigi_http_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, route), metrics in routes:
+            for status_code, count in sorted(metrics.responses.items()):
+                lines.append(
+                    f"kaigi_http_requests_total"
+                    f"{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+        for name, attribute, help_text in (
+            ("kaigi_http_request_duration_seconds", "latency",
+             "Time from receiving a request to sending the last body chunk."),
+            ("kaigi_http_request_sql_queries", "queries",
+             "SQL statements executed per request."),
+            ("kaigi_http_request_sql_duration_seconds", "sql_seconds",
+             "Time spent executing SQL per request."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), metrics in routes:
+                histogram = getattr(metrics, attribute)
+                labels = _labels(method=method, route=route)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        lines += [
+            "# HELP kaigi_db_background_queries_total SQL statements run outside requests.",
+            "# TYPE kaigi_db_background_queries_total counter",
+            f"kaigi_db_background_queries_total {self.background.queries}",
+            "# HELP kaigi_db_background_query_seconds_total "
+            "Time spent on SQL outside requests.",
+            "# TYPE kaigi_db_background_query_seconds_total counter",
+            f"kaigi_db_background_query_seconds_total {self.background.sql_seconds}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and SQL work per matched route.
+
+    Written as plain ASGI rather than BaseHTTPMiddleware so streaming
+    responses are not buffered and the per-request overhead stays small.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        token = _current_request.set(request)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            # FastAPI stores the matched APIRoute in the scope
+            route = scope.get("route")
+            self.registry.record(
+                scope["method"], getattr(route, "path", UNMATCHED_ROUTE),
+                status_code, elapsed, request)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    request = _current_request.get() or metrics.background
+    request.queries += 1
+    request.sql_seconds += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Count statements and SQL time on a (sync) engine, per request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstrument_engine(engine) -> None:
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
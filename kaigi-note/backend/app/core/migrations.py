@@ -0,0 +1,104 @@
+from pathlib import Path
+
+from sqlalchemy.engine import Connection
+
+from .config import settings
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# PostgreSQL advisory lock key held while migrating; any constant works as
+# long as every instance uses the same one
+MIGRATION_LOCK_KEY = 4_172_019_001
+
+
+# Created with raw DDL (app.services.search, app.services.date_range)
+# rather than declared on the models; autogenerate must leave them alone or
+# the next revision would drop the search and date-range indexes
+UNMANAGED_TABLES = {
+    # SQLite FTS5 table and its shadow tables
+    "events_fts", "events_fts_data", "events_fts_idx", "events_fts_config",
+    "events_fts_docsize", "events_fts_content",
+}
+UNMANAGED_INDEXES = {"ix_events_search_trgm", "ix_events_time_range"}
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Alembic ``include_name`` hook skipping the unmanaged schema objects."""
+    if type_ == "table":
+        return name not in UNMANAGED_TABLES
+    if type_ == "index":
+        return name not in UNMANAGED_INDEXES
+    return True
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """The database is not at the Alembic head revision."""
+
+
+def alembic_config():
+    """Alembic config for this project, independent of the working directory."""
+    # Imported here so that only the "check" startup mode pays for Alembic
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    # ConfigParser interpolation treats "%" specially (e.g. in passwords)
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+    return config
+
+
+def get_head_revisions() -> set:
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+def get_current_revisions(connection: Connection) -> set:
+    from alembic.runtime.migration import MigrationContext
+
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def check_schema(connection: Connection) -> None:
+    """Raise SchemaOutOfDateError unless the database is at the Alembic head."""
+    current = get_current_revisions(connection)
+    heads = get_head_revisions()
+    if current != heads:
+        raise SchemaOutOfDateError(
+            f"Database is at revision {', '.join(sorted(current)) or '(none)'}, "
+            f"expected {', '.join(sorted(heads))}; run `alembic upgrade head`"
+        )
+
+
+def upgrade_database() -> None:
+    """Run ``alembic upgrade head`` once across instances booting together.
+
+    On PostgreSQL the upgrade runs while holding a session advisory lock:
+    the first instance migrates, the others wait for it and then find the
+    database already at head. Other databases are local to one machine
+    and are simply upgraded.
+    """
+    from alembic import command
+    from sqlalchemy import create_engine, pool, text
+
+    config = alembic_config()
+    engine = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    try:
+        with engine.connect() as connection:
+            locked = connection.dialect.name == "postgresql"
+            if locked:
+                connection.execute(
+                    text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+            try:
+                # Picked up by alembic/env.py instead of opening its own
+                config.attributes["connection"] = connection
+                command.upgrade(config, "head")
+                connection.commit()
+            finally:
+                if locked:
+                    connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                    connection.commit()
+    finally:
+        engine.dispose()
@@ -0,0 +1,213 @@
+"""Request-scoped detection of repeated (N+1) and slow SQL.
+
+Every statement a request executes is grouped by its SQL text, so the
+same parameterized query issued once per row shows up as one group with
+a high count. A request violates its budget when any group runs more
+than ``repeat_threshold`` times, or when its total SQL time exceeds
+``sql_budget_ms``. Violations are logged with the statement and the
+application line that first issued it; with ``raise_on_violation`` (test
+mode) the offending statement raises QueryBudgetExceeded instead.
+
+Enabled for the app with QUERY_TRACKER_ENABLED. Outside requests, e.g.
+in a test, wrap the code in ``track_queries()``.
+"""
+import logging
+import sys
+import sysconfig
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from greenlet import getcurrent
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = str(Path(__file__).resolve().parents[1])
+# Frames in these files are plumbing, never the call site worth reporting
+_SKIPPED_FILES = {
+    str(Path(__file__).resolve()),
+    str(Path(__file__).resolve().with_name("database.py")),
+    str(Path(__file__).resolve().with_name("metrics.py")),
+}
+
+# Outside the app (tests, scripts) the first non-library frame is reported
+_LIBRARY_DIRS = tuple({sysconfig.get_paths()[name] for name in ("stdlib", "purelib", "platlib")})
+
+MAX_STATEMENT_LENGTH = 300
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request repeated a statement too often or spent too long in SQL."""
+
+
+def _describe_frame(frame) -> str:
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def find_call_site() -> str:
+    """The innermost application frame that led to the current statement.
+
+    Async sessions run the driver call in a greenlet whose own stack holds
+    only SQLAlchemy frames, so the walk continues into the parent
+    greenlet, where the awaiting application coroutine is suspended.
+    """
+    frame = sys._getframe(1)
+    current = getcurrent()
+    fallback = None
+    while True:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename not in _SKIPPED_FILES:
+                if filename.startswith(APP_DIR):
+                    return (f"{Path(filename).relative_to(Path(APP_DIR).parent)}:"
+                            f"{frame.f_lineno} in {frame.f_code.co_name}")
+                if fallback is None and not filename.startswith(_LIBRARY_DIRS) \
+                        and not filename.startswith("<"):
+                    fallback = _describe_frame(frame)
+            frame = frame.f_back
+        current = current.parent
+        if current is None or current.gr_frame is None:
+            return fallback or "unknown"
+        frame = current.gr_frame
+
+
+class StatementGroup:
+    __slots__ = ("count", "seconds", "call_site")
+
+    def __init__(self, call_site: str):
+        self.count = 0
+        self.seconds = 0.0
+        self.call_site = call_site
+
+
+class QueryTracker:
+    """Statements executed within one request, grouped by SQL text."""
+
+    def __init__(self, label: str, repeat_threshold: int, sql_budget_ms: float,
+                 raise_on_violation: bool = False, scope: Optional[dict] = None):
+        self._label = label
+        self.scope = scope
+        self.repeat_threshold = repeat_threshold
+        self.sql_budget = sql_budget_ms / 1000
+        self.raise_on_violation = raise_on_violation
+        self.statements: Dict[str, StatementGroup] = {}
+        self.sql_seconds = 0.0
+
+    @property
+    def label(self) -> str:
+        # Prefer the route template once FastAPI has matched the request
+        route = self.scope.get("route") if self.scope is not None else None
+        if route is not None:
+            return f"{self.scope['method']} {route.path}"
+        return self._label
+
+    def record(self, statement: str, seconds: float) -> None:
+        group = self.statements.get(statement)
+        if group is None:
+            group = self.statements[statement] = StatementGroup(find_call_site())
+        group.count += 1
+        group.seconds += seconds
+        self.sql_seconds += seconds
+        if not self.raise_on_violation:
+            return
+        if group.count == self.repeat_threshold + 1:
+            raise QueryBudgetExceeded(self._describe_repeat(statement, group))
+        if self.sql_seconds > self.sql_budget >= self.sql_seconds - seconds:
+            raise QueryBudgetExceeded(self._describe_budget())
+
+    def _describe_repeat(self, statement: str, group: StatementGroup) -> str:
+        return (f"{self.label}: statement ran {group.count} times "
+                f"(threshold {self.repeat_threshold}), {group.seconds * 1000:.1f} ms, "
+                f"first at {group.call_site}: {_shorten(statement)}")
+
+    def _describe_budget(self) -> str:
+        statement, group = max(self.statements.items(), key=lambda item: item[1].seconds)
+        return (f"{self.label}: SQL took {self.sql_seconds * 1000:.1f} ms "
+                f"(budget {self.sql_budget * 1000:.0f} ms) over "
+                f"{sum(g.count for g in self.statements.values())} statements; "
+                f"slowest {group.count} x {group.seconds * 1000:.1f} ms "
+                f"at {group.call_site}: {_shorten(statement)}")
+
+    def violations(self) -> List[str]:
+        found = [
+            self._describe_repeat(statement, group)
+            for statement, group in self.statements.items()
+            if group.count > self.repeat_threshold
+        ]
+        if self.sql_seconds > self.sql_budget:
+            found.append(self._describe_budget())
+        return found
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        return statement[:MAX_STATEMENT_LENGTH] + "..."
+    return statement
+
+
+_current_tracker: ContextVar[Optional[QueryTracker]] = ContextVar(
+    "current_query_tracker", default=None)
+
+
+@contextmanager
+def track_queries(label: str = "block", repeat_threshold: Optional[int] = None,
+                  sql_budget_ms: Optional[float] = None,
+                  raise_on_violation: Optional[bool] = None, scope: Optional[dict] = None):
+    """Track statements run in this context; log (or raise) on violations.
+
+    Statements are only seen on engines passed to install_query_tracker,
+    which the app does for its own engines when QUERY_TRACKER_ENABLED.
+    """
+    tracker = QueryTracker(
+        label,
+        settings.QUERY_TRACKER_REPEAT_THRESHOLD if repeat_threshold is None
+        else repeat_threshold,
+        settings.QUERY_TRACKER_SQL_BUDGET_MS if sql_budget_ms is None else sql_budget_ms,
+        settings.QUERY_TRACKER_RAISE if raise_on_violation is None else raise_on_violation,
+        scope,
+    )
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+        # Raising mode has already failed at the offending statement
+        if not tracker.raise_on_violation:
+            for violation in tracker.violations():
+                logger.warning(violation)
+
+
+class QueryTrackerMiddleware:
+    """Run each HTTP request inside track_queries(), labelled by route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries(f"{scope['method']} {scope['path']}", scope=scope):
+            await self.app(scope, receive, send)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._tracker_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.record(statement, time.perf_counter() - context._tracker_started)
+
+
+def install_query_tracker(engine) -> None:
+    """Feed statements executed on a (sync) engine to the active tracker."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
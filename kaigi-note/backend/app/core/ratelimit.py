@@ -0,0 +1,99 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, status
+
+from .config import settings
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [tokens, last refill time], least recently used first
+        self.buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+
+class RateLimiter:
+    """Token buckets keyed by an arbitrary string (client IP, account).
+
+    Each key holds up to ``burst`` tokens, refilled at ``per_minute / 60``
+    per second; a request takes one. Keys are spread over ``shards``
+    independently locked LRU maps holding at most ``max_keys`` keys in
+    total. A key that has been idle long enough to refill completely is
+    indistinguishable from a new one, so the least recently used key is
+    evicted when a shard is full.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int, shards: int = 16):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard.buckets) for shard in self._shards)
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take a token for ``key``; return 0 if allowed, else seconds to wait."""
+        now = time.monotonic() if now is None else now
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                if len(shard.buckets) >= self.max_keys_per_shard:
+                    shard.buckets.popitem(last=False)
+                bucket = shard.buckets[key] = [float(self.burst), now]
+            else:
+                shard.buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+
+
+def client_ip(request: Request) -> str:
+    """The client address, from RATE_LIMIT_CLIENT_IP_HEADER behind a proxy."""
+    if settings.RATE_LIMIT_CLIENT_IP_HEADER:
+        forwarded = request.headers.get(settings.RATE_LIMIT_CLIENT_IP_HEADER)
+        if forwarded:
+            # In X-Forwarded-For style lists only the last entry, appended by
+            # the proxy in front of the app, is trustworthy; the client can
+            # put anything before it
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def enforce(limiter: RateLimiter, key: str) -> None:
+    """Raise 429 with Retry-After when ``key`` is out of tokens."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    retry_after = limiter.acquire(key)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+login_ip_limiter = RateLimiter(
+    settings.LOGIN_RATE_PER_IP_PER_MINUTE, settings.LOGIN_BURST_PER_IP,
+    settings.RATE_LIMIT_MAX_KEYS)
+login_account_limiter = RateLimiter(
+    settings.LOGIN_RATE_PER_ACCOUNT_PER_MINUTE, settings.LOGIN_BURST_PER_ACCOUNT,
+    settings.RATE_LIMIT_MAX_KEYS)
+register_ip_limiter = RateLimiter(
+    settings.REGISTER_RATE_PER_IP_PER_MINUTE, settings.REGISTER_BURST_PER_IP,
+    settings.RATE_LIMIT_MAX_KEYS)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .cache import TTLCache
+from .config import settings
+from .database import AsyncReadSessionLocal, AsyncSessionLocal
+from ..models.replica_heartbeat import ReplicaHeartbeat
+
+logger = logging.getLogger(__name__)
+
+# Set on responses to writes; clients echo it so their reads stay on the
+# primary even when served by another worker
+CONSISTENT_READ_HEADER = "X-Consistent-Read-Until"
+
+HEARTBEAT_ID = 1
+
+# Replica states; reads only go to the replica while it is OK
+UNCHECKED = "unchecked"
+OK = "ok"
+LAGGING = "lagging"
+DOWN = "down"
+
+# Read routing outcomes: the replica, or why the primary was used instead
+ROUTE_REPLICA = "replica"
+ROUTE_RECENT_WRITE = "recent_write"
+
+
+class ReplicaMonitor:
+    """Tracks read replica lag and decides where each read goes.
+
+    Every ``interval`` seconds the heartbeat row is read from the replica
+    and then stamped on the primary, so the replica's copy is behind by
+    the replication lag (measured to within one interval). Reads go to the
+    primary until the first check, while the lag exceeds ``max_lag`` and
+    while the replica is unreachable; users who wrote in the last
+    ``read_your_writes`` seconds are also kept on the primary (up to
+    ``max_recent_writers`` of them per worker, beyond which the oldest rely
+    on the header their client echoes).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        read_session_factory: async_sessionmaker = AsyncReadSessionLocal,
+        interval: float = settings.REPLICA_CHECK_INTERVAL,
+        max_lag: float = settings.REPLICA_MAX_LAG_SECONDS,
+        read_your_writes: float = settings.READ_YOUR_WRITES_SECONDS,
+        max_recent_writers: int = settings.READ_YOUR_WRITES_MAX_USERS,
+    ):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+        self.interval = interval
+        self.max_lag = max_lag
+        self.read_your_writes = read_your_writes
+        self.status = UNCHECKED
+        self.lag_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.check_failures = 0
+        self.reads: Dict[str, int] = {}
+        self._recent_writers = TTLCache(maxsize=max_recent_writers, ttl=read_your_writes)
+        self._task: Optional[asyncio.Task] = None
+
+    def note_write(self, user_id: int) -> str:
+        """Keep ``user_id``'s reads on the primary; return the header value."""
+        self._recent_writers.set(user_id, True)
+        return f"{time.time() + self.read_your_writes:.3f}"
+
+    def route(self, user_id: int, consistent_until: Optional[str] = None) -> str:
+        """Return ROUTE_REPLICA, or the reason the read must use the primary."""
+        if self._recent_writers.get(user_id) is not None:
+            return ROUTE_RECENT_WRITE
+        if consistent_until:
+            try:
+                if float(consistent_until) > time.time():
+                    return ROUTE_RECENT_WRITE
+            except ValueError:
+                pass
+        if self.status != OK:
+            return f"replica_{self.status}"
+        return ROUTE_REPLICA
+
+    def record(self, route: str) -> None:
+        self.reads[route] = self.reads.get(route, 0) + 1
+
+    def mark_down(self) -> None:
+        """Stop using the replica until the next successful check."""
+        self.status = DOWN
+
+    async def _beat(self, now: datetime) -> None:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(ReplicaHeartbeat)
+                .where(ReplicaHeartbeat.id == HEARTBEAT_ID)
+                .values(beat_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                db.add(ReplicaHeartbeat(id=HEARTBEAT_ID, beat_at=now))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another worker inserted the row first
+                await db.rollback()
+
+    async def check(self) -> Optional[float]:
+        """Measure the lag once and update the status; return the lag."""
+        now = datetime.now(timezone.utc)
+        try:
+            async with self.read_session_factory() as db:
+                beat_at = (await db.execute(
+                    select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.id == HEARTBEAT_ID)
+                )).scalar_one_or_none()
+        except (OSError, SQLAlchemyError):
+            logger.warning("Read replica check failed", exc_info=True)
+            self.check_failures += 1
+            self.status = DOWN
+            self.lag_seconds = None
+        else:
+            if beat_at is None:
+                # Nothing replicated yet
+                self.lag_seconds = None
+                self.status = LAGGING
+            else:
+                # SQLite hands back naive datetimes; the heartbeat is UTC
+                if beat_at.tzinfo is None:
+                    beat_at = beat_at.replace(tzinfo=timezone.utc)
+                self.lag_seconds = max(0.0, (now - beat_at).total_seconds())
+                self.status = OK if self.lag_seconds <= self.max_lag else LAGGING
+        self.checked_at = time.time()
+        await self._beat(now)
+        return self.lag_seconds
+
+    async def run(self) -> None:
+        """Check until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Replica heartbeat failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": self.max_lag,
+            "seconds_since_check":
+                None if self.checked_at is None else time.time() - self.checked_at,
+            "check_failures": self.check_failures,
+            "reads": dict(self.reads),
+        }
+
+    def render(self) -> str:
+        """Render the replica metrics in the Prometheus text format."""
+        lag = "NaN" if self.lag_seconds is None else self.lag_seconds
+        lines = [
+            "# HELP kaigi_db_replica_lag_seconds Read replica lag at the last check.",
+            "# TYPE kaigi_db_replica_lag_seconds gauge",
+            f"kaigi_db_replica_lag_seconds {lag}",
+            "# HELP kaigi_db_replica_up Whether reads may use the replica (1) or not (0).",
+            "# TYPE kaigi_db_replica_up gauge",
+            f"kaigi_db_replica_up {int(self.status == OK)}",
+            "# HELP kaigi_db_replica_check_failures_total Lag checks that could not "
+            "reach the replica.",
+            "# TYPE kaigi_db_replica_check_failures_total counter",
+            f"kaigi_db_replica_check_failures_total {self.check_failures}",
+            "# HELP kaigi_db_reads_total Read sessions, by database and the reason "
+            "for using it.",
+            "# TYPE kaigi_db_reads_total counter",
+        ]
+        for route, count in sorted(self.reads.items()):
+            target = "replica" if route == ROUTE_REPLICA else "primary"
+            lines.append(f'kaigi_db_reads_total{{target="{target}",reason="{route}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+replica_monitor = ReplicaMonitor()
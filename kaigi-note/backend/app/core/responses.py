@@ -0,0 +1,34 @@
+from typing import Dict, List, Optional, Sequence, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def schema_columns(schema: Type[BaseModel], model, **extra) -> List:
+    """Columns for ``schema``'s fields, in field order.
+
+    Selecting exactly these makes each row serialize to the same JSON the
+    schema would produce. Fields that are not plain model attributes (for
+    example a joined user name) are passed as labelled ``extra`` columns.
+    """
+    return [
+        extra[name].label(name) if name in extra else getattr(model, name)
+        for name in schema.__fields__
+    ]
+
+
+def rows_response(rows, headers: Optional[Dict[str, str]] = None,
+                  exclude: Sequence[str] = ()) -> ORJSONResponse:
+    """Serialize Core result rows as a JSON list with orjson.
+
+    Skips the ORM -> pydantic -> jsonable_encoder -> json.dumps round trip
+    of response_model; the output is byte-identical for the same columns.
+    Columns named in ``exclude`` (e.g. row versions selected for the ETag)
+    are left out.
+    """
+    if exclude:
+        return ORJSONResponse([
+            {key: value for key, value in row._mapping.items() if key not in exclude}
+            for row in rows
+        ], headers=headers)
+    return ORJSONResponse([dict(row._mapping) for row in rows], headers=headers)
@@ -0,0 +1,132 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .config import settings
+from .database import AsyncSessionLocal
+from ..models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Each sync re-reads revocations this far behind the newest one seen, so a
+# row whose transaction committed after a later one is still picked up
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything stored here is UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class RevocationList:
+    """In-process denylist of revoked token ids (jti).
+
+    Lookups are a dict membership test, so authenticating a request never
+    queries the database. Revocations made by this worker apply at once;
+    those made by other workers arrive through an incremental sync every
+    ``sync_interval`` seconds. Entries leave the set when their token
+    expires (a min-heap keeps pruning cheap), and expired rows are deleted
+    from the table every ``prune_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        sync_interval: float = settings.REVOCATION_SYNC_INTERVAL,
+        prune_interval: float = settings.REVOCATION_PRUNE_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self._expires: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._cursor: Optional[datetime] = None
+        self._last_db_prune = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._expires
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        if jti not in self._expires:
+            expires = _utc(expires_at).timestamp()
+            self._expires[jti] = expires
+            heapq.heappush(self._heap, (expires, jti))
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Forget entries whose token has expired anyway."""
+        now = time.time() if now is None else now
+        pruned = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            self._expires.pop(jti, None)
+            pruned += 1
+        return pruned
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """Record a revocation in the caller's transaction and apply it locally.
+
+        The caller commits; a duplicate jti fails the commit with an
+        IntegrityError, meaning the token was already revoked.
+        """
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        await db.flush()
+        self.add(jti, expires_at)
+
+    async def sync(self) -> int:
+        """Load revocations made since the last sync; return how many rows were read."""
+        now = datetime.now(timezone.utc)
+        query = select(
+            RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+        ).where(RevokedToken.expires_at > now)
+        if self._cursor is not None:
+            query = query.where(RevokedToken.revoked_at >= self._cursor - SYNC_OVERLAP)
+
+        async with self.session_factory() as db:
+            rows = (await db.execute(query)).all()
+            if time.monotonic() - self._last_db_prune >= self.prune_interval:
+                await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                await db.commit()
+                self._last_db_prune = time.monotonic()
+
+        for jti, expires_at, revoked_at in rows:
+            self.add(jti, expires_at)
+            revoked_at = _utc(revoked_at)
+            if self._cursor is None or revoked_at > self._cursor:
+                self._cursor = revoked_at
+        self.prune()
+        return len(rows)
+
+    async def run(self) -> None:
+        """Sync until cancelled."""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Token revocation sync failed")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_list = RevocationList()
@@ -1,29 +1,144 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .core.database import engine, Base
+from .core.config import settings
+from .core.database import Base, get_async_engine, get_pool_status
+from .core.deps import get_current_user
+from .core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+from .core.pagination import NEXT_CURSOR_HEADER
+from .core.query_tracker import QueryTrackerMiddleware
+from .core.replica import CONSISTENT_READ_HEADER, replica_monitor
+from .core.revocation import revocation_list
+from .core.security import password_hasher
 from .routers import auth, users, events, participants
+from .services.changefeed import change_feed
+from .services.discord import discord_dispatcher
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+DB_STARTUP_MODES = ("create", "check", "none")
 
-app = FastAPI(title="KaigiNote API")
 
-# CORS middleware to allow frontend to communicate with backend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # React frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def prepare_database(mode: str = None) -> None:
+    """Create or verify the schema according to DB_STARTUP_MODE."""
+    mode = mode or settings.DB_STARTUP_MODE
+    if mode not in DB_STARTUP_MODES:
+        raise ValueError(
+            f"DB_STARTUP_MODE must be one of {', '.join(DB_STARTUP_MODES)}, got {mode!r}")
+    if mode == "none":
+        return
+    async with get_async_engine().begin() as connection:
+        if mode == "create":
+            await connection.run_sync(Base.metadata.create_all)
+        else:
+            from .core.migrations import check_schema
+            await connection.run_sync(check_schema)
 
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(events.router, prefix="/api/events", tags=["events"])
-app.include_router(participants.router, prefix="/api", tags=["participants"])
 
+def create_app() -> FastAPI:
+    """Build the application.
 
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to KaigiNote API"}
+    Nothing here touches the database; the schema is handled by the startup
+    hook, and engines are created on first use.
+    """
+    app = FastAPI(title="KaigiNote API")
+
+    # CORS middleware to allow frontend to communicate with backend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],  # React frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, CONSISTENT_READ_HEADER],
+    )
+
+    if settings.QUERY_TRACKER_ENABLED:
+        app.add_middleware(QueryTrackerMiddleware)
+
+    # Outermost, so latency includes the other middleware
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+    app.include_router(users.router, prefix="/api/users", tags=["users"])
+    app.include_router(events.router, prefix="/api/events", tags=["events"])
+    app.include_router(participants.router, prefix="/api", tags=["participants"])
+
+    @app.on_event("startup")
+    async def prepare_schema():
+        await prepare_database()
+
+    @app.on_event("startup")
+    async def start_revocation_sync():
+        # Load every live revocation before serving, then follow changes
+        await revocation_list.sync()
+        revocation_list.start()
+
+    @app.on_event("shutdown")
+    async def stop_revocation_sync():
+        await revocation_list.stop()
+
+    @app.on_event("startup")
+    async def start_replica_monitor():
+        # Reads stay on the primary until the first lag measurement
+        if settings.DATABASE_READ_URL:
+            await replica_monitor.check()
+            replica_monitor.start()
+
+    @app.on_event("shutdown")
+    async def stop_replica_monitor():
+        await replica_monitor.stop()
+
+    @app.on_event("startup")
+    async def start_change_feed():
+        change_feed.start()
+
+    @app.on_event("shutdown")
+    async def stop_change_feed():
+        await change_feed.stop()
+
+    @app.on_event("startup")
+    async def start_discord_dispatcher():
+        if discord_dispatcher.webhook_url:
+            discord_dispatcher.start()
+
+    @app.on_event("shutdown")
+    async def stop_discord_dispatcher():
+        await discord_dispatcher.stop()
+
+    @app.on_event("shutdown")
+    def shutdown_password_hasher():
+        password_hasher.shutdown()
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Welcome to KaigiNote API"}
+
+    @app.get("/api/health/pool", dependencies=[Depends(get_current_user)])
+    def read_pool_status():
+        """Live connection pool metrics, for sizing DB_POOL_SIZE/DB_MAX_OVERFLOW.
+
+        Internal state, so only for signed-in users.
+        """
+        return get_pool_status()
+
+    @app.get("/api/health/replica")
+    def read_replica_status():
+        """Read replica lag, whether reads use it, and where reads went."""
+        if not settings.DATABASE_READ_URL:
+            return {"status": "disabled"}
+        return replica_monitor.snapshot()
+
+    if settings.METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        def read_metrics():
+            """Per-route latency, query count and SQL time for Prometheus."""
+            body = metrics.render()
+            if settings.DATABASE_READ_URL:
+                body += replica_monitor.render()
+            body += change_feed.render()
+            return Response(body, media_type=CONTENT_TYPE)
+
+    return app
+
+
+app = create_app()
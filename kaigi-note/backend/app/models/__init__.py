@@ -1,6 +1,10 @@
 from .user import User
 from .event import Event
 from .participant import EventParticipant
+from .notification import NotificationOutbox
+from .revoked_token import RevokedToken
+from .replica_heartbeat import ReplicaHeartbeat
 
 # Export all models
-__all__ = ["User", "Event", "EventParticipant"]
+__all__ = ["User", "Event", "EventParticipant", "NotificationOutbox", "RevokedToken",
+           "ReplicaHeartbeat"]
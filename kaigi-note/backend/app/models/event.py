@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index
+from sqlalchemy.sql import func, literal_column
 from ..core.database import Base
 
 
@@ -18,8 +18,24 @@ class Event(Base):
     total_cost = Column(Integer, default=0)
     # New field for max participants
     max_participants = Column(Integer, nullable=True)
+    # Confirmed participants, maintained by app.services.capacity so seats
+    # can be taken with one conditional UPDATE
+    participant_count = Column(Integer, nullable=False, default=0, server_default="0")
     # New field to control event visibility
     is_public = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
                         server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE of the row, Core ones included; ETags are
+    # built from it since updated_at only has second resolution on SQLite
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version", Integer) + 1)
+
+    # Indexes for the listing, ordered by start_time desc with id breaking ties,
+    # and for date-range overlap queries (PostgreSQL also gets a GiST range
+    # index, see app.services.date_range)
+    __table_args__ = (
+        Index("ix_events_start_time_id", "start_time", "id"),
+        Index("ix_events_status_start_time_id", "status", "start_time", "id"),
+        Index("ix_events_start_time_end_time", "start_time", "end_time"),
+    )
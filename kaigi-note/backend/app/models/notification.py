@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class NotificationOutbox(Base):
+    """Pending Discord notification, written in the same transaction as the change."""
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Discord embed to deliver
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True),
+                             nullable=False, server_default=func.now())
+    # Set while a dispatcher is delivering the row; once it passes (the
+    # dispatcher died mid-delivery) the row is due again
+    claimed_until = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Dispatcher polls unsent rows that are due, oldest first
+    __table_args__ = (
+        Index("ix_notification_outbox_pending", "sent_at", "next_attempt_at", "id"),
+    )
@@ -1,8 +1,12 @@
 from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, String
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from sqlalchemy.orm import relationship
 from ..core.database import Base
 
+# Values of EventParticipant.enrollment_status
+CONFIRMED = "confirmed"
+WAITLISTED = "waitlisted"
+
 
 class EventParticipant(Base):
     """Event participant model."""
@@ -10,13 +14,20 @@ class EventParticipant(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Indexed on its own; uix_event_user only serves lookups by event_id
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     paid_amount = Column(Integer, default=0)
     # New field for attendance status
     attendance_status = Column(String(50), default="pending")
+    # Waitlisted participants are confirmed in order as seats free up
+    enrollment_status = Column(String(20), nullable=False, default=CONFIRMED,
+                               server_default=CONFIRMED)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
                         server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE, like Event.version
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version", Integer) + 1)
 
     # Relationships
     event = relationship("Event", backref="participants")
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime
+from ..core.database import Base
+
+
+class ReplicaHeartbeat(Base):
+    """Single row stamped on the primary and read back from the read
+    replica; how old the replica's copy is gives the replication lag."""
+    __tablename__ = "replica_heartbeat"
+
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class RevokedToken(Base):
+    """Token id (jti) revoked before its expiry, by logout or refresh rotation."""
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # The unique constraint also makes refresh token rotation single-use
+    jti = Column(String(64), unique=True, nullable=False)
+    # Token expiry; the row is useless, and pruned, after this
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Incremental sync cursor for the in-process denylist
+    revoked_at = Column(DateTime(timezone=True), nullable=False,
+                        server_default=func.now(), index=True)
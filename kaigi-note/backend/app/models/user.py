@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from ..core.database import Base
 
 
@@ -18,3 +18,6 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
                         server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE, like Event.version
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version", Integer) + 1)
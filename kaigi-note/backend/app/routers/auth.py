@@ -1,63 +1,177 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from jose import jwt, JWTError
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
 
-from ..core.database import get_db
-from ..core.security import create_access_token, verify_password, get_password_hash
+from ..core.database import get_async_db
+from ..core.deps import optional_oauth2_scheme, user_cache
+from ..core.ratelimit import (
+    client_ip, enforce, login_account_limiter, login_ip_limiter, register_ip_limiter
+)
+from ..core.revocation import revocation_list
+from ..core.security import (
+    ALGORITHM, REFRESH_TOKEN, SECRET_KEY, create_access_token, create_refresh_token,
+    hash_password_async, verify_password_async
+)
 from ..core.config import settings
 from ..models.user import User
-from ..schemas.user import UserCreate, User as UserSchema, Token
+from ..schemas.user import (
+    UserCreate, User as UserSchema, Token, RefreshRequest, LogoutRequest, TokenPayload
+)
 
 router = APIRouter()
 
 
+def _issue_tokens(user_id: int) -> dict:
+    access_token_expires = timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": create_access_token(
+            data={"sub": str(user_id)}, expires_delta=access_token_expires),
+        "refresh_token": create_refresh_token(data={"sub": str(user_id)}),
+        "token_type": "bearer",
+    }
+
+
+def _decode_token(token: Optional[str]) -> Optional[TokenPayload]:
+    if not token:
+        return None
+    try:
+        return TokenPayload(**jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+    except (JWTError, ValidationError):
+        return None
+
+
+async def _revoke(db: AsyncSession, token: TokenPayload) -> bool:
+    """Revoke a token until it expires; False if it was already revoked."""
+    expires_at = datetime.fromtimestamp(token.exp, timezone.utc)
+    try:
+        await revocation_list.revoke(db, token.jti, expires_at)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
 @router.post("/register", response_model=UserSchema)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(
+    user_in: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)
+):
     """Register a new user."""
+    # Throttle before any lookup or hashing
+    enforce(register_ip_limiter, client_ip(request))
+
     # Check if user with this email already exists
-    db_user = db.query(User).filter(User.email == user_in.email).first()
+    result = await db.execute(select(User).where(User.email == user_in.email))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
+    # Hash on the dedicated pool; bcrypt is CPU-bound
+    password_hash = await hash_password_async(user_in.password)
+
     # Create new user
     db_user = User(
         name=user_in.name,
         email=user_in.email,
-        password_hash=get_password_hash(user_in.password)
+        password_hash=password_hash
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Login and get access token."""
+    # Throttle before any lookup or hashing; bcrypt is what a credential
+    # stuffing burst would saturate
+    enforce(login_ip_limiter, client_ip(request))
+    enforce(login_account_limiter, form_data.username.lower())
+
     # Find user by email
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    result = await db.execute(select(User).where(User.email == form_data.username))
+    user = result.scalars().first()
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Create access token
-    access_token_expires = timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+    valid, new_hash = await verify_password_async(form_data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Transparently upgrade hashes made with a different bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        user_cache.pop(user.id)
+
+    # Create access and refresh tokens
+    return _issue_tokens(user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(refresh_in: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access and refresh token.
+
+    Refresh tokens are single-use: the presented one is revoked, and a
+    second attempt with it fails.
+    """
+    token = _decode_token(refresh_in.refresh_token)
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    if (token is None or token.type != REFRESH_TOKEN or not token.jti
+            or token.sub is None or revocation_list.is_revoked(token.jti)):
+        raise invalid
+
+    result = await db.execute(
+        select(User.id).where(User.id == token.sub, User.is_active.is_not(False)))
+    if result.scalars().first() is None:
+        raise invalid
+
+    # The unique jti makes rotation atomic across workers
+    if not await _revoke(db, token):
+        raise invalid
+    return _issue_tokens(token.sub)
 
 
 @router.post("/logout")
-def logout():
-    """Logout (client-side only for JWT)."""
-    # For JWT, logout is handled client-side by removing the token
+async def logout(
+    logout_in: Optional[LogoutRequest] = None,
+    access_token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Logout: revoke the bearer access token and, if given, the refresh token.
+
+    Without a token this only acknowledges; the client drops its token.
+    """
+    refresh_token = logout_in.refresh_token if logout_in else None
+    for token in (_decode_token(access_token), _decode_token(refresh_token)):
+        if token is not None and token.jti and not revocation_list.is_revoked(token.jti):
+            await _revoke(db, token)
     return {"message": "Logged out successfully"}
@@ -1,52 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
+from starlette.background import BackgroundTask
+from starlette.status import HTTP_400_BAD_REQUEST
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
+from ..core.database import get_async_db
+from ..core.deps import get_current_user, get_read_db
+from ..core.etag import make_etag, etag_matches, not_modified
+from ..core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from ..core.responses import schema_columns, rows_response
 from ..models.user import User
 from ..models.event import Event
-from ..schemas.event import Event as EventSchema, EventCreate, EventUpdate, EventWithParticipants
-from ..services.discord import send_discord_notification
+from ..models.participant import WAITLISTED, EventParticipant
+from ..schemas.event import (
+    Event as EventSchema, EventCreate, EventUpdate, EventWithParticipants, EventSummary,
+    EventDayCount
+)
+from ..services.capacity import fill_from_waitlist
+from ..services.changefeed import change_feed, publish_change
+from ..services.date_range import apply_time_range, count_events_per_day
+from ..services.discord import enqueue_discord_notification, discord_dispatcher
+from ..services.export import export_response
+from ..services.search import apply_keyword_search
 
 router = APIRouter()
 
+# Largest number of ids accepted by the batched summary endpoint
+MAX_SUMMARY_IDS = 100
+
+# Columns of the listing response, in EventSchema field order
+EVENT_COLUMNS = schema_columns(EventSchema, Event)
+
+
+def _decode_event_cursor(cursor: str):
+    """Decode an events cursor into its (start_time, id) keyset position."""
+    position = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(position["start_time"]), int(position["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
 
 @router.get("/", response_model=List[EventSchema])
-def get_events(
-    db: Session = Depends(get_db),
+async def get_events(
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     keyword: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get all events with optional filtering."""
-    query = db.query(Event)
+    """Get all events with optional filtering.
+
+    ``from`` and ``to`` restrict the listing to events overlapping that
+    window (either may be omitted); the range is answered from an index.
+
+    Pass the X-Next-Cursor response header back as ``cursor`` to fetch the
+    next page; ``skip`` is ignored when a cursor is given. Keyword results
+    are ranked by relevance and paginate with ``skip`` only.
+
+    Responses carry a weak ETag built from the ids and versions of the
+    page's rows; a matching If-None-Match gets a 304 without the rows being
+    encoded. Rows are selected as plain columns and encoded with orjson,
+    bypassing response_model validation.
+    """
+    if keyword and cursor:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="cursor cannot be combined with keyword"
+        )
+
+    if from_ and to and from_ >= to:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="from must be earlier than to"
+        )
+
+    query = select(*EVENT_COLUMNS, Event.version)
+    dialect = db.get_bind().dialect.name
 
     # Apply filters if provided
     if keyword:
-        query = query.filter(
-            (Event.place.contains(keyword)) |
-            (Event.content.contains(keyword))
-        )
+        query = apply_keyword_search(query, keyword, dialect)
 
     if status:
-        query = query.filter(Event.status == status)
+        query = query.where(Event.status == status)
+
+    if from_ or to:
+        query = apply_time_range(query, from_, to, dialect)
+
+    # Order by start_time descending (newest first), id breaking ties
+    query = query.order_by(Event.start_time.desc(), Event.id.desc())
 
-    # Order by start_time descending (newest first)
-    query = query.order_by(Event.start_time.desc())
+    # Apply pagination: keyset when a cursor is given, offset otherwise
+    if cursor:
+        query = query.where(
+            tuple_(Event.start_time, Event.id) < _decode_event_cursor(cursor))
+    else:
+        query = query.offset(skip)
 
-    # Apply pagination
-    events = query.offset(skip).limit(limit).all()
-    return events
+    result = await db.execute(query.limit(limit))
+    events = result.all()
+
+    # The ETag covers exactly the rows of this page, read from an index
+    etag = make_etag([(event.id, event.version) for event in events],
+                     skip, limit, cursor, keyword, status, from_, to)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag}
+
+    if events and len(events) == limit and not keyword:
+        last = events[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            {"start_time": last.start_time.isoformat(), "id": last.id})
+    return rows_response(events, headers, exclude=("version",))
 
 
 @router.post("/", response_model=EventSchema)
 async def create_event(
     event_in: EventCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new event."""
@@ -57,33 +141,208 @@ async def create_event(
         place=event_in.place,
         content=event_in.content,
         status=event_in.status,
-        total_cost=event_in.total_cost
+        total_cost=event_in.total_cost,
+        max_participants=event_in.max_participants
     )
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    await db.flush()
+
+    # Queue the Discord notification in the same transaction
+    enqueue_discord_notification(db, db_event, "created")
+    publish_change(db, "event.created", db_event.id)
 
-    # Send Discord notification in the background
-    event_schema = EventSchema.from_orm(db_event)
-    background_tasks.add_task(
-        send_discord_notification, event_schema, "created")
+    await db.commit()
+    await db.refresh(db_event)
+    discord_dispatcher.notify()
 
     return db_event
 
 
-@router.get("/{event_id}", response_model=EventWithParticipants)
-def get_event(
+@router.get("/export")
+async def export_events(
+    export_format: str = Query("ndjson", alias="format", regex="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every event as NDJSON or CSV, oldest first."""
+    statement = select(
+        Event.id, Event.title, Event.start_time, Event.end_time, Event.place,
+        Event.content, Event.status, Event.total_cost, Event.max_participants,
+        Event.is_public, Event.created_at, Event.updated_at,
+    ).order_by(Event.id)
+    return export_response(statement, export_format, "events")
+
+
+@router.get("/stream")
+async def stream_changes(
+    event_id: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Server-sent events for changes to events and their participants.
+
+    Each message is named after the change ("event.created",
+    "participant.deleted", ...) and carries the ids involved; pass
+    ``event_id`` to receive only that event's changes. A "reset" message
+    means changes may have been missed and everything should be refetched.
+    """
+    if event_id is not None:
+        result = await db.execute(select(Event.id).where(Event.id == event_id))
+        if result.scalars().first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
+    # The stream outlives the request; do not hold a connection for it
+    await db.close()
+    # Nothing awaits between taking the slot and handing its release to the
+    # response, which runs it however the stream ends
+    if not change_feed.reserve():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams",
+            headers={"Retry-After": "30"},
+        )
+
+    return StreamingResponse(
+        change_feed.subscribe(event_id, last_event_id),
+        media_type="text/event-stream",
+        # Keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(change_feed.release),
+    )
+
+
+@router.get("/calendar", response_model=List[EventDayCount])
+async def get_event_calendar(
+    year: int = Query(..., ge=1, le=9998),
+    month: int = Query(..., ge=1, le=12),
+    utc_offset: int = Query(0, ge=-840, le=840),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the number of events on each day of a month.
+
+    ``utc_offset`` is the viewer's offset from UTC in minutes (540 for
+    JST) and decides where days begin. Events spanning several days are
+    counted on each of them.
+    """
+    counts = await count_events_per_day(db, year, month, timedelta(minutes=utc_offset))
+    return [EventDayCount(date=day, count=count) for day, count in counts]
+
+
+async def _get_summaries(db: AsyncSession, event_ids: List[int]) -> Dict[int, EventSummary]:
+    """Compute summaries for the given events with two aggregate queries."""
+    result = await db.execute(
+        select(Event.id, Event.total_cost).where(Event.id.in_(event_ids)))
+    summaries = {
+        event_id: EventSummary(event_id=event_id, total_cost=total_cost or 0)
+        for event_id, total_cost in result
+    }
+    if not summaries:
+        return summaries
+
+    attendance_status = func.coalesce(EventParticipant.attendance_status, "pending")
+    result = await db.execute(
+        select(
+            EventParticipant.event_id,
+            attendance_status,
+            func.count(),
+            func.count(case((EventParticipant.enrollment_status == WAITLISTED, 1))),
+            func.coalesce(func.sum(EventParticipant.paid_amount), 0),
+        )
+        .where(EventParticipant.event_id.in_(list(summaries)))
+        .group_by(EventParticipant.event_id, attendance_status)
+    )
+    for event_id, attendance, count, waitlisted, paid in result:
+        summary = summaries[event_id]
+        summary.attendance[attendance] = count
+        summary.participant_count += count - waitlisted
+        summary.waitlist_count += waitlisted
+        summary.paid_total += paid
+
+    for summary in summaries.values():
+        summary.outstanding = summary.total_cost - summary.paid_total
+    return summaries
+
+
+@router.get("/summary", response_model=List[EventSummary])
+async def get_event_summaries(
+    ids: str,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get summaries for several events, e.g. ``?ids=1,2,3``.
+
+    Unknown ids are omitted from the response.
+    """
+    try:
+        event_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not event_ids or len(event_ids) > MAX_SUMMARY_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {MAX_SUMMARY_IDS} ids"
+        )
+
+    summaries = await _get_summaries(db, event_ids)
+    return [summaries[event_id] for event_id in event_ids if event_id in summaries]
+
+
+@router.get("/{event_id}/summary", response_model=EventSummary)
+async def get_event_summary(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific event by ID."""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    """Get paid totals, outstanding balance and attendance counts for an event."""
+    summaries = await _get_summaries(db, [event_id])
+    if event_id not in summaries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    return summaries[event_id]
+
+
+@router.get("/{event_id}", response_model=EventWithParticipants)
+async def get_event(
+    event_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get a specific event by ID.
+
+    Responses carry a weak ETag built from the versions of the event and
+    its participants; a matching If-None-Match gets a 304 without the
+    response being serialized.
+    """
+    # Two queries regardless of participant count: the event, then all of
+    # its participants in one IN query. Any other relationship access raises
+    # instead of silently issuing per-row queries
+    result = await db.execute(
+        select(Event)
+        .options(selectinload(Event.participants).raiseload("*"), raiseload("*"))
+        .where(Event.id == event_id)
+    )
+    event = result.scalars().first()
     if event is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
+
+    etag = make_etag(event.id, event.version, [
+        (participant.id, participant.version) for participant in event.participants])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return event
 
 
@@ -91,13 +350,17 @@ def get_event(
 async def update_event(
     event_id: int,
     event_in: EventUpdate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update an event."""
+    """Update an event.
+
+    Raising max_participants confirms waitlisted participants, oldest
+    first, into the new seats.
+    """
     # Check if the event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
+    result = await db.execute(select(Event).where(Event.id == event_id))
+    event = result.scalars().first()
     if event is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -112,26 +375,32 @@ async def update_event(
         setattr(event, field, value)
 
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    if "max_participants" in update_data:
+        # The flush writes the event row, locking it for the seat count
+        await db.flush()
+        await fill_from_waitlist(db, event_id)
+    publish_change(db, "event.updated", event_id)
+    await db.commit()
+    await db.refresh(event)
 
-    # Send Discord notification in the background (optional for updates)
-    # Uncomment if you want notifications for updates
-    # event_schema = EventSchema.from_orm(event)
-    # background_tasks.add_task(send_discord_notification, event_schema, "updated")
+    # Queue a Discord notification (optional for updates)
+    # Uncomment if you want notifications for updates; call it before commit
+    # so the notification is written in the same transaction
+    # enqueue_discord_notification(db, event, "updated")
 
     return event
 
 
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(
+async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an event."""
     # Check if the event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
+    result = await db.execute(select(Event).where(Event.id == event_id))
+    event = result.scalars().first()
     if event is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,6 +408,7 @@ def delete_event(
         )
 
     # Delete the event
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    publish_change(db, "event.deleted", event_id)
+    await db.commit()
     return None
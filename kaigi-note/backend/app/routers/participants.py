@@ -1,76 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from pydantic import conlist
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
+from ..core.database import get_async_db
+from ..core.deps import get_current_user, get_read_db
+from ..core.etag import make_etag, etag_matches, not_modified
+from ..core.responses import schema_columns, rows_response
 from ..models.user import User
 from ..models.event import Event
-from ..models.participant import EventParticipant
-from ..schemas.participant import Participant, ParticipantCreate, ParticipantUpdate, ParticipantWithUser
+from ..models.participant import CONFIRMED, WAITLISTED, EventParticipant
+from ..schemas.participant import (
+    Participant, ParticipantCreate, ParticipantUpdate, ParticipantWithUser,
+    BulkStatus, ParticipantBulkResult
+)
+from ..services.capacity import release_seat, take_seats
+from ..services.changefeed import publish_change
+from ..services.export import export_response
 
 router = APIRouter()
 
+# Largest number of entries accepted by one bulk enrollment request
+MAX_BULK_PARTICIPANTS = 1000
+
+# Columns of the listing response, in ParticipantWithUser field order
+PARTICIPANT_WITH_USER_COLUMNS = schema_columns(
+    ParticipantWithUser, EventParticipant, user_name=User.name)
+
 
 @router.get("/events/{event_id}/participants", response_model=List[ParticipantWithUser])
-def get_event_participants(
+async def get_event_participants(
     event_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get all participants for a specific event."""
+    """Get all participants for a specific event.
+
+    Responses carry a weak ETag built from the versions of the rows (user
+    names included); a matching If-None-Match gets a 304 without them being
+    encoded. Rows are selected as plain columns and encoded with orjson.
+    """
     # Check if the event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
+    result = await db.execute(select(Event.id).where(Event.id == event_id))
+    event = result.scalars().first()
     if event is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
 
-    # Get participants with user info
-    participants = db.query(
-        EventParticipant, User.name.label("user_name")
+    # Get participants with user info, as plain columns
+    result = await db.execute(select(
+        *PARTICIPANT_WITH_USER_COLUMNS,
+        EventParticipant.version,
+        User.version.label("user_version"),
     ).join(
         User, EventParticipant.user_id == User.id
-    ).filter(
+    ).where(
         EventParticipant.event_id == event_id
-    ).all()
-
-    # Convert to response model
-    result = []
-    for participant, user_name in participants:
-        participant_dict = {
-            "id": participant.id,
-            "event_id": participant.event_id,
-            "user_id": participant.user_id,
-            "paid_amount": participant.paid_amount,
-            "created_at": participant.created_at,
-            "updated_at": participant.updated_at,
-            "user_name": user_name
-        }
-        result.append(participant_dict)
+    ))
+    participants = result.all()
 
-    return result
+    etag = make_etag(event_id, [
+        (participant.id, participant.version, participant.user_version)
+        for participant in participants])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return rows_response(participants, {"ETag": etag}, exclude=("version", "user_version"))
 
 
-@router.post("/events/{event_id}/participants", response_model=Participant)
-def create_participant(
+@router.get("/events/{event_id}/participants/export")
+async def export_event_participants(
     event_id: int,
-    participant_in: ParticipantCreate,
-    db: Session = Depends(get_db),
+    export_format: str = Query("ndjson", alias="format", regex="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Add a participant to an event."""
+    """Stream all participants of an event as NDJSON or CSV."""
     # Check if the event exists
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if event is None:
+    result = await db.execute(select(Event.id).where(Event.id == event_id))
+    if result.scalars().first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
+    # The stream reads through its own session; give this connection back
+    # first so concurrent exports cannot exhaust the pool holding two each
+    await db.close()
+
+    statement = select(
+        EventParticipant.id, EventParticipant.event_id, EventParticipant.user_id,
+        User.name.label("user_name"), EventParticipant.paid_amount,
+        EventParticipant.attendance_status, EventParticipant.enrollment_status,
+        EventParticipant.created_at,
+        EventParticipant.updated_at,
+    ).join(
+        User, EventParticipant.user_id == User.id
+    ).where(
+        EventParticipant.event_id == event_id
+    ).order_by(EventParticipant.id)
+    return export_response(statement, export_format, f"event-{event_id}-participants")
+
 
+@router.post("/events/{event_id}/participants", response_model=Participant)
+async def create_participant(
+    event_id: int,
+    participant_in: ParticipantCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Add a participant to an event.
+
+    When the event has no free seat left the participant is added with
+    enrollment_status "waitlisted" and confirmed later, in joining order,
+    as seats free up.
+    """
     # Check if the user exists
-    user = db.query(User).filter(User.id == participant_in.user_id).first()
+    result = await db.execute(
+        select(User.id).where(User.id == participant_in.user_id))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,10 +129,11 @@ def create_participant(
         )
 
     # Check if the participant already exists
-    existing_participant = db.query(EventParticipant).filter(
+    result = await db.execute(select(EventParticipant.id).where(
         EventParticipant.event_id == event_id,
         EventParticipant.user_id == participant_in.user_id
-    ).first()
+    ))
+    existing_participant = result.scalars().first()
 
     if existing_participant:
         raise HTTPException(
@@ -89,32 +141,152 @@ def create_participant(
             detail="User is already a participant in this event"
         )
 
+    # Take a seat with a conditional UPDATE; it fails when the event is
+    # full or does not exist
+    confirmed = await take_seats(db, event_id)
+    if not confirmed:
+        result = await db.execute(select(Event.id).where(Event.id == event_id))
+        if result.scalars().first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Event not found"
+            )
+
     # Create new participant
     db_participant = EventParticipant(
         event_id=event_id,
         user_id=participant_in.user_id,
-        paid_amount=participant_in.paid_amount
+        paid_amount=participant_in.paid_amount,
+        enrollment_status=CONFIRMED if confirmed else WAITLISTED
     )
     db.add(db_participant)
-    db.commit()
-    db.refresh(db_participant)
+    try:
+        await db.flush()
+        publish_change(db, "participant.created", event_id,
+                       participant_id=db_participant.id,
+                       enrollment_status=db_participant.enrollment_status)
+        await db.commit()
+    except IntegrityError:
+        # Joined concurrently; the rollback also returns the seat
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is already a participant in this event"
+        )
+    # No refresh: the INSERT already fetched created_at/updated_at with RETURNING
     return db_participant
 
 
+@router.post("/events/{event_id}/participants/bulk", response_model=List[ParticipantBulkResult])
+async def create_participants_bulk(
+    event_id: int,
+    participants_in: conlist(ParticipantCreate, min_items=1, max_items=MAX_BULK_PARTICIPANTS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Add many participants to an event at once.
+
+    Returns one result per entry, in request order. When the event has a
+    max_participants limit, entries beyond the remaining capacity are
+    added to the waitlist.
+    """
+    # Lock the event row so concurrent enrollments see a consistent count
+    result = await db.execute(
+        select(Event.id, Event.max_participants, Event.participant_count)
+        .where(Event.id == event_id)
+        .with_for_update()
+    )
+    event = result.first()
+    if event is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+
+    user_ids = {participant_in.user_id for participant_in in participants_in}
+
+    # One query for the users that exist, one for those already enrolled
+    result = await db.execute(select(User.id).where(User.id.in_(user_ids)))
+    existing_users = set(result.scalars())
+    result = await db.execute(select(EventParticipant.user_id).where(
+        EventParticipant.event_id == event_id,
+        EventParticipant.user_id.in_(user_ids)
+    ))
+    enrolled = set(result.scalars())
+
+    remaining = None
+    if event.max_participants is not None:
+        remaining = max(event.max_participants - event.participant_count, 0)
+
+    results = []
+    to_insert = []
+    seats = 0
+    for participant_in in participants_in:
+        user_id = participant_in.user_id
+        if user_id not in existing_users:
+            item_status = BulkStatus.user_not_found
+        elif user_id in enrolled:
+            item_status = BulkStatus.duplicate
+        else:
+            enrolled.add(user_id)
+            if remaining is not None and seats >= remaining:
+                item_status = BulkStatus.waitlisted
+            else:
+                item_status = BulkStatus.created
+                seats += 1
+            to_insert.append({
+                "event_id": event_id,
+                "user_id": user_id,
+                "paid_amount": participant_in.paid_amount,
+                "enrollment_status":
+                    CONFIRMED if item_status == BulkStatus.created else WAITLISTED,
+            })
+        results.append(ParticipantBulkResult(user_id=user_id, status=item_status))
+
+    # One guarded UPDATE for the seats, then a single multi-row
+    # INSERT ... RETURNING for every accepted entry. The guard only fails
+    # where the row lock above is not available (SQLite) and a concurrent
+    # enrollment took seats in between
+    created = {}
+    if to_insert:
+        try:
+            conflict = seats and not await take_seats(db, event_id, seats)
+            if not conflict:
+                result = await db.execute(
+                    insert(EventParticipant).returning(EventParticipant), to_insert)
+                created = {participant.user_id: participant for participant in result.scalars()}
+                publish_change(db, "participant.bulk_created", event_id, count=len(created))
+                await db.commit()
+        except IntegrityError:
+            conflict = True
+        if conflict:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Participants changed concurrently, please retry"
+            )
+
+    for item in results:
+        if item.status in (BulkStatus.created, BulkStatus.waitlisted):
+            item.participant = Participant.from_orm(created[item.user_id])
+    return results
+
+
 @router.put("/events/{event_id}/participants/{participant_id}", response_model=Participant)
-def update_participant(
+async def update_participant(
     event_id: int,
     participant_id: int,
     participant_in: ParticipantUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a participant."""
     # Check if the participant exists
-    participant = db.query(EventParticipant).filter(
+    result = await db.execute(select(EventParticipant).where(
         EventParticipant.id == participant_id,
         EventParticipant.event_id == event_id
-    ).first()
+    ))
+    participant = result.scalars().first()
 
     if participant is None:
         raise HTTPException(
@@ -130,24 +302,29 @@ def update_participant(
         setattr(participant, field, value)
 
     db.add(participant)
-    db.commit()
-    db.refresh(participant)
+    publish_change(db, "participant.updated", event_id, participant_id=participant_id)
+    await db.commit()
+    await db.refresh(participant)
     return participant
 
 
 @router.delete("/events/{event_id}/participants/{participant_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_participant(
+async def delete_participant(
     event_id: int,
     participant_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Delete a participant."""
+    """Delete a participant.
+
+    A confirmed participant's seat goes to the first waitlisted one.
+    """
     # Check if the participant exists
-    participant = db.query(EventParticipant).filter(
+    result = await db.execute(select(EventParticipant).where(
         EventParticipant.id == participant_id,
         EventParticipant.event_id == event_id
-    ).first()
+    ))
+    participant = result.scalars().first()
 
     if participant is None:
         raise HTTPException(
@@ -156,6 +333,10 @@ def delete_participant(
         )
 
     # Delete the participant
-    db.delete(participant)
-    db.commit()
+    await db.delete(participant)
+    if participant.enrollment_status == CONFIRMED:
+        await db.flush()
+        await release_seat(db, event_id)
+    publish_change(db, "participant.deleted", event_id, participant_id=participant_id)
+    await db.commit()
     return None
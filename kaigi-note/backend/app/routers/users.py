@@ -1,44 +1,77 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..core.security import get_password_hash
+from ..core.database import get_async_db
+from ..core.deps import get_current_user, get_read_db, user_cache
+from ..core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from ..core.responses import schema_columns, rows_response
+from ..core.security import hash_password_async
 from ..models.user import User
 from ..schemas.user import User as UserSchema, UserUpdate
 
 router = APIRouter()
 
+# Columns of the listing response, in UserSchema field order
+USER_COLUMNS = schema_columns(UserSchema, User)
+
 
 @router.get("/", response_model=List[UserSchema])
-def get_users(
-    db: Session = Depends(get_db),
+async def get_users(
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
-    """Get all users (for admin purposes)."""
+    """Get all users (for admin purposes).
+
+    Pass the X-Next-Cursor response header back as ``cursor`` to fetch the
+    next page; ``skip`` is ignored when a cursor is given. Rows are
+    selected as plain columns and encoded with orjson.
+    """
     # In a real app, you might want to check if the current user is an admin
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    query = select(*USER_COLUMNS).order_by(User.id)
+
+    # Apply pagination: keyset when a cursor is given, offset otherwise
+    if cursor:
+        try:
+            after_id = int(decode_cursor(cursor)["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(User.id > after_id)
+    else:
+        query = query.offset(skip)
+
+    result = await db.execute(query.limit(limit))
+    users = result.all()
+
+    headers = {}
+    if users and len(users) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": users[-1].id})
+    return rows_response(users, headers)
 
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user info."""
     return current_user
 
 
 @router.get("/{user_id}", response_model=UserSchema)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific user by ID."""
     # In a real app, you might want to check if the current user has permission
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,15 +81,16 @@ def get_user(
 
 
 @router.put("/{user_id}", response_model=UserSchema)
-def update_user(
+async def update_user(
     user_id: int,
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a user."""
     # Check if the user exists
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,7 +109,7 @@ def update_user(
 
     # Hash the password if it's being updated
     if "password" in update_data:
-        update_data["password_hash"] = get_password_hash(
+        update_data["password_hash"] = await hash_password_async(
             update_data.pop("password"))
 
     # Update user attributes
@@ -83,6 +117,7 @@ def update_user(
         setattr(user, field, value)
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    user_cache.pop(user.id)
     return user
@@ -1,10 +1,20 @@
-from .user import User, UserCreate, UserUpdate, Token, TokenPayload
-from .event import Event, EventCreate, EventUpdate, EventWithParticipants
-from .participant import Participant, ParticipantCreate, ParticipantUpdate, ParticipantWithUser
+from .user import (
+    User, UserCreate, UserUpdate, Token, RefreshRequest, LogoutRequest, TokenPayload
+)
+from .event import (
+    Event, EventCreate, EventUpdate, EventWithParticipants, EventSummary, EventDayCount
+)
+from .participant import (
+    Participant, ParticipantCreate, ParticipantUpdate, ParticipantWithUser,
+    BulkStatus, ParticipantBulkResult
+)
 
 # Export all schemas
 __all__ = [
-    "User", "UserCreate", "UserUpdate", "Token", "TokenPayload",
-    "Event", "EventCreate", "EventUpdate", "EventWithParticipants",
-    "Participant", "ParticipantCreate", "ParticipantUpdate", "ParticipantWithUser"
+    "User", "UserCreate", "UserUpdate", "Token", "RefreshRequest", "LogoutRequest",
+    "TokenPayload",
+    "Event", "EventCreate", "EventUpdate", "EventWithParticipants", "EventSummary",
+    "EventDayCount",
+    "Participant", "ParticipantCreate", "ParticipantUpdate", "ParticipantWithUser",
+    "BulkStatus", "ParticipantBulkResult"
 ]
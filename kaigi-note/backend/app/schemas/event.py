@@ -1,8 +1,16 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, conint, validator
+from typing import Optional, List, Dict
+from datetime import date, datetime, timezone
 from .participant import ParticipantBase
 
+
+def _to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite stores only the wall-clock time, so keep every stored time in
+    # UTC for date-range queries to compare them correctly
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc)
+    return value
+
 # Shared properties
 
 
@@ -13,6 +21,10 @@ class EventBase(BaseModel):
     content: Optional[str] = None
     status: Optional[str] = "planned"
     total_cost: Optional[int] = 0
+    # Unlimited when None; joins beyond it are waitlisted
+    max_participants: Optional[conint(ge=0)] = None
+
+    _utc_times = validator("start_time", "end_time", allow_reuse=True)(_to_utc)
 
 # Properties to receive via API on creation
 
@@ -30,12 +42,17 @@ class EventUpdate(BaseModel):
     content: Optional[str] = None
     status: Optional[str] = None
     total_cost: Optional[int] = None
+    max_participants: Optional[conint(ge=0)] = None
+
+    _utc_times = validator("start_time", "end_time", allow_reuse=True)(_to_utc)
 
 # Properties to return via API
 
 
 class Event(EventBase):
     id: int
+    # Confirmed participants; waitlisted ones are not counted
+    participant_count: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -50,3 +67,25 @@ class EventWithParticipants(Event):
 
     class Config:
         orm_mode = True
+
+# Financial and attendance summary computed in SQL
+
+
+class EventSummary(BaseModel):
+    event_id: int
+    total_cost: int = 0
+    # Confirmed participants; attendance counts include the waitlist
+    participant_count: int = 0
+    waitlist_count: int = 0
+    paid_total: int = 0
+    # total_cost minus paid_total; negative when participants overpaid
+    outstanding: int = 0
+    # Participant counts keyed by attendance_status
+    attendance: Dict[str, int] = {}
+
+# Number of events on one calendar day
+
+
+class EventDayCount(BaseModel):
+    date: date
+    count: int
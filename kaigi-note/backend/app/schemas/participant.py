@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from enum import Enum
 from datetime import datetime
 
 # Shared properties
@@ -9,6 +10,10 @@ class ParticipantBase(BaseModel):
     user_id: int
     paid_amount: Optional[int] = 0
 
+    class Config:
+        # Serialized from ORM rows when nested in EventWithParticipants
+        orm_mode = True
+
 # Properties to receive via API on creation
 
 
@@ -27,6 +32,8 @@ class ParticipantUpdate(BaseModel):
 class Participant(ParticipantBase):
     id: int
     event_id: int
+    # "confirmed", or "waitlisted" while the event is full
+    enrollment_status: str
     created_at: datetime
     updated_at: datetime
 
@@ -41,3 +48,19 @@ class ParticipantWithUser(Participant):
 
     class Config:
         orm_mode = True
+
+# Outcome of one entry in a bulk enrollment
+
+
+class BulkStatus(str, Enum):
+    created = "created"
+    duplicate = "duplicate"
+    user_not_found = "user_not_found"
+    # Added to the waitlist because the event is full
+    waitlisted = "waitlisted"
+
+
+class ParticipantBulkResult(BaseModel):
+    user_id: int
+    status: BulkStatus
+    participant: Optional[Participant] = None
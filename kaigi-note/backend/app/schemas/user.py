@@ -40,9 +40,23 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    # Revoked along with the access token when given
+    refresh_token: Optional[str] = None
 
 # Properties to receive via API for token
 
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    exp: Optional[int] = None
+    # Absent from tokens issued before revocation support
+    jti: Optional[str] = None
+    type: Optional[str] = None
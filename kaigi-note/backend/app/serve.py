@@ -0,0 +1,128 @@
+"""Production server: ``python -m app.serve``.
+
+Applies pending Alembic migrations once (see
+app.core.migrations.upgrade_database), then runs gunicorn with uvicorn
+workers. The app is imported in the master before the workers are forked,
+so they share its memory pages and a replaced worker starts serving
+immediately. Worker count, recycling and the SIGTERM drain are set by the
+WEB_* settings:
+
+    python -m app.serve                  # migrate, then serve
+    python -m app.serve --migrate-only   # e.g. as a release command
+    python -m app.serve --reload         # development: one reloading worker
+"""
+import argparse
+import math
+import os
+import sys
+from pathlib import Path
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+from .core.config import settings
+from .core.migrations import upgrade_database
+from .services.changefeed import change_feed
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, within any cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        # "max 100000" when unlimited, else "<quota> <period>" (containers)
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count() -> int:
+    return settings.WEB_CONCURRENCY or available_cpus()
+
+
+class DrainingServer(Server):
+    async def shutdown(self, sockets=None):
+        # The listening sockets are closed before this yields to the streams
+        change_feed.close()
+        await super().shutdown(sockets=sockets)
+
+
+class Worker(UvicornWorker):
+    """UvicornWorker that ends the change feed streams when it shuts down.
+
+    uvicorn waits for open responses before exiting, and a server-sent
+    events stream never finishes on its own; closing them once the worker
+    has stopped accepting connections lets it drain and the clients
+    reconnect to another worker.
+    """
+
+    async def _serve(self) -> None:
+        # As UvicornWorker._serve, with the server class swapped
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": "app.serve.Worker",
+        "preload_app": True,
+        "max_requests": settings.WEB_MAX_REQUESTS,
+        "max_requests_jitter": settings.WEB_MAX_REQUESTS_JITTER,
+        # SIGTERM stops accepting connections, lets in-flight requests and
+        # the shutdown hooks finish, and kills workers still busy after this
+        "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT,
+        "keepalive": settings.WEB_KEEPALIVE,
+        "accesslog": "-",
+    }
+
+
+def serve() -> None:
+    # Imported here, in the master, so that the workers inherit it
+    from .main import app
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the KaigiNote API server.")
+    parser.add_argument("--migrate-only", action="store_true",
+                        help="apply migrations and exit")
+    parser.add_argument("--reload", action="store_true",
+                        help="single auto-reloading uvicorn process, for development")
+    args = parser.parse_args()
+
+    if settings.MIGRATE_ON_START or args.migrate_only:
+        upgrade_database()
+    if args.migrate_only:
+        return
+    if args.reload:
+        import uvicorn
+
+        uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=True)
+        return
+    serve()
+
+
+if __name__ == "__main__":
+    main()
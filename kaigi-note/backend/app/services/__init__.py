@@ -1,4 +1,4 @@
-from .discord import send_discord_notification
+from .discord import build_discord_embed, enqueue_discord_notification, discord_dispatcher
 
 # Export all services
-__all__ = ["send_discord_notification"]
+__all__ = ["build_discord_embed", "enqueue_discord_notification", "discord_dispatcher"]
@@ -0,0 +1,83 @@
+"""Seat accounting for events with a max_participants limit.
+
+``Event.participant_count`` holds the number of confirmed participants.
+Seats are only ever taken by an UPDATE whose WHERE clause checks the
+count against the limit, so however many joins race, the database lets
+exactly as many through as there are seats; the rest are waitlisted.
+The UPDATE also locks the event row (the whole database on SQLite)
+until the transaction ends, which serializes every seat change of an
+event without a separate SELECT ... FOR UPDATE.
+"""
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.event import Event
+from ..models.participant import CONFIRMED, WAITLISTED, EventParticipant
+
+
+def has_room(seats: int):
+    """Clause true when an event can take ``seats`` more participants."""
+    return or_(
+        Event.max_participants.is_(None),
+        Event.participant_count + seats <= Event.max_participants,
+    )
+
+
+def _add_seats(event_id: int, seats: int, *criteria):
+    return update(Event).where(Event.id == event_id, *criteria).values(
+        participant_count=Event.participant_count + seats
+    ).execution_options(synchronize_session=False)
+
+
+async def take_seats(db: AsyncSession, event_id: int, seats: int = 1) -> bool:
+    """Take ``seats`` seats at once if that many are free.
+
+    Returns False when the event is full (or does not exist). The caller
+    commits.
+    """
+    result = await db.execute(_add_seats(event_id, seats, has_room(seats)))
+    return result.rowcount == 1
+
+
+async def fill_from_waitlist(db: AsyncSession, event_id: int) -> int:
+    """Confirm waitlisted participants, oldest first, while seats are free.
+
+    The caller must already have written the event row in this
+    transaction, so that the free seats read here cannot change before
+    commit. Returns how many participants were confirmed.
+    """
+    result = await db.execute(
+        select(Event.participant_count, Event.max_participants)
+        .where(Event.id == event_id)
+        .with_for_update()
+    )
+    event = result.first()
+    if event is None:
+        return 0
+
+    query = select(EventParticipant.id).where(
+        EventParticipant.event_id == event_id,
+        EventParticipant.enrollment_status == WAITLISTED,
+    ).order_by(EventParticipant.id)
+    if event.max_participants is not None:
+        free = event.max_participants - event.participant_count
+        if free <= 0:
+            return 0
+        query = query.limit(free)
+
+    promoted = (await db.execute(query)).scalars().all()
+    if promoted:
+        await db.execute(
+            update(EventParticipant)
+            .where(EventParticipant.id.in_(promoted))
+            .values(enrollment_status=CONFIRMED)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(_add_seats(event_id, len(promoted)))
+    return len(promoted)
+
+
+async def release_seat(db: AsyncSession, event_id: int) -> None:
+    """Give back a confirmed participant's seat, offering it to the waitlist."""
+    await db.execute(_add_seats(event_id, -1))
+    await fill_from_waitlist(db, event_id)
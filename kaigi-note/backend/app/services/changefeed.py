@@ -0,0 +1,347 @@
+"""Live feed of changes to events and their participants.
+
+Routers call ``publish_change`` inside the transaction that makes the
+change; once it commits, the change is delivered to the subscribers of
+this worker's ``change_feed`` and, on PostgreSQL, sent with NOTIFY to
+every other worker, which LISTEN for it. Subscribers read the feed as
+server-sent events from ``GET /api/events/stream``.
+
+Messages only carry ids (plus an enrollment status); clients refetch what
+they display, which the ETag-aware endpoints keep cheap.
+"""
+import asyncio
+import logging
+import os
+import socket
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import get_async_engine
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL channel shared by all workers
+NOTIFY_CHANNEL = "kaigi_changes"
+
+# Changes published in a session, delivered after it commits
+SESSION_KEY = "change_feed_pending"
+
+# Largest number of NOTIFYs sent in one statement
+MAX_NOTIFY_BATCH = 100
+
+# Events whose last change dropped from the history is remembered, so an
+# event's subscribers are only reset when one of its own changes was lost
+MAX_DROPPED_EVENTS = 10000
+
+# Sent when a subscriber may have missed changes (it fell behind the
+# history, or resumed from another worker); clients refetch everything
+RESET_FRAME = b"event: reset\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def publish_change(db: AsyncSession, kind: str, event_id: int, **fields) -> None:
+    """Queue a change in the caller's transaction.
+
+    ``kind`` is e.g. "event.updated" or "participant.created". Nothing is
+    delivered unless the transaction commits.
+    """
+    db.info.setdefault(SESSION_KEY, []).append({"kind": kind, "event_id": event_id, **fields})
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed(session: Session) -> None:
+    changes = session.info.pop(SESSION_KEY, None)
+    if changes:
+        change_feed.publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(SESSION_KEY, None)
+
+
+class ChangeFeed:
+    """In-process fan-out of changes to server-sent event subscribers.
+
+    Each change is encoded once into an SSE frame and kept in a short
+    history; subscribers only remember the sequence number of the last
+    frame they sent. An idle subscriber is a single future, registered
+    under its event id (or None for all events) so that a change wakes
+    only the subscribers interested in it. A keepalive wakes all of them
+    every ``keepalive`` seconds, without a timer per subscriber.
+
+    Changes that fall out of the history are remembered by sequence number
+    only: the newest one overall, and the newest one per event (for the
+    last ``MAX_DROPPED_EVENTS`` events). A subscriber is reset when a change
+    it would have received was dropped before it was sent.
+    """
+
+    def __init__(
+        self,
+        history: int = settings.STREAM_HISTORY_SIZE,
+        keepalive: float = settings.STREAM_KEEPALIVE_SECONDS,
+        max_subscribers: int = settings.STREAM_MAX_SUBSCRIBERS,
+        retry_ms: int = settings.STREAM_RETRY_MS,
+    ):
+        self.keepalive = keepalive
+        self.max_subscribers = max_subscribers
+        self.retry_ms = retry_ms
+        self.subscribers = 0
+        self.delivered = 0
+        # Set in start(), so forked workers do not share the master's
+        self.origin = ""
+        self._seq = 0
+        self._ticks = 0
+        self._history: Deque[Tuple[int, int, bytes]] = deque(maxlen=history)
+        # Newest sequence number dropped from the history, overall and per
+        # event; events forgotten from the latter raise _dropped_floor
+        self._dropped = 0
+        self._dropped_by_event: "OrderedDict[int, int]" = OrderedDict()
+        self._dropped_floor = 0
+        self._waiters: Dict[Optional[int], Set[asyncio.Future]] = {}
+        self._outbox: List[bytes] = []
+        self._outbox_ready: Optional[asyncio.Event] = None
+        self._closing = False
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def relay(self) -> bool:
+        """Whether changes are shared with other workers (PostgreSQL only)."""
+        return make_url(settings.DATABASE_URL).get_backend_name() in ("postgresql", "postgres")
+
+    def publish(self, changes: List[dict]) -> None:
+        """Deliver committed changes here, and to other workers when relaying."""
+        for change in changes:
+            self.deliver(change)
+        if self._outbox_ready is not None:
+            self._outbox.extend(
+                orjson.dumps({**change, "origin": self.origin}) for change in changes)
+            self._outbox_ready.set()
+
+    def deliver(self, change: dict) -> None:
+        self._seq += 1
+        self.delivered += 1
+        data = orjson.dumps({k: v for k, v in change.items() if k != "origin"})
+        frame = (f"id: {self.origin}-{self._seq}\nevent: {change['kind']}\n".encode()
+                 + b"data: " + data + b"\n\n")
+        if not self._history.maxlen:
+            self._drop(self._seq, change["event_id"])
+        elif len(self._history) == self._history.maxlen:
+            self._drop(*self._history[0][:2])
+        self._history.append((self._seq, change["event_id"], frame))
+        self._wake(None)
+        self._wake(change["event_id"])
+
+    def reset(self) -> None:
+        """Make every subscriber resynchronize (changes may have been missed)."""
+        self._history.clear()
+        self._seq += 1
+        self._dropped = self._dropped_floor = self._seq
+        self._dropped_by_event.clear()
+        self._wake_all()
+
+    def _drop(self, seq: int, event_id: int) -> None:
+        self._dropped = seq
+        self._dropped_by_event[event_id] = seq
+        self._dropped_by_event.move_to_end(event_id)
+        if len(self._dropped_by_event) > MAX_DROPPED_EVENTS:
+            _, forgotten = self._dropped_by_event.popitem(last=False)
+            self._dropped_floor = forgotten
+
+    def close(self) -> None:
+        """End every stream, e.g. before the server stops accepting requests."""
+        self._closing = True
+        self._wake_all()
+
+    def _wake(self, event_id: Optional[int]) -> None:
+        for waiter in self._waiters.pop(event_id, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _wake_all(self) -> None:
+        for event_id in list(self._waiters):
+            self._wake(event_id)
+
+    async def _wait(self, event_id: Optional[int]) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(event_id, set())
+        waiters.add(waiter)
+        try:
+            await waiter
+        finally:
+            waiters.discard(waiter)
+            if not waiters and self._waiters.get(event_id) is waiters:
+                del self._waiters[event_id]
+
+    def _since(self, after: int, event_id: Optional[int]) -> Optional[List[Tuple[int, bytes]]]:
+        """Frames after sequence number ``after``, or None if some were dropped."""
+        if after >= self._seq:
+            return []
+        if event_id is None:
+            dropped = self._dropped
+        else:
+            dropped = max(self._dropped_by_event.get(event_id, 0), self._dropped_floor)
+        if dropped > after:
+            return None
+        frames = []
+        for seq, frame_event_id, frame in reversed(self._history):
+            if seq <= after:
+                break
+            if event_id is None or frame_event_id == event_id:
+                frames.append((seq, frame))
+        frames.reverse()
+        return frames
+
+    def _resume_point(self, last_event_id: Optional[str]) -> Optional[int]:
+        # Ids are "<origin>-<seq>"; sequence numbers only mean something
+        # on the worker that assigned them
+        origin, _, seq = (last_event_id or "").rpartition("-")
+        if origin != self.origin or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        return int(seq)
+
+    def reserve(self) -> bool:
+        """Take a subscriber slot for a stream about to open; False when full.
+
+        The slot counts from here rather than from the first frame, so
+        concurrent requests cannot all get past the limit; give it back
+        with release() once the response has ended.
+        """
+        if self.subscribers >= self.max_subscribers:
+            return False
+        self.subscribers += 1
+        return True
+
+    def release(self) -> None:
+        self.subscribers -= 1
+
+    async def subscribe(
+        self, event_id: Optional[int] = None, last_event_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """Yield SSE frames for changes to ``event_id`` (or all events).
+
+        A client reconnecting with the Last-Event-ID header first gets what
+        it missed, or a reset when that is no longer known here. The caller
+        holds a slot from reserve() for the stream.
+        """
+        yield f"retry: {self.retry_ms}\n\n".encode()
+        after = self._seq
+        if last_event_id is not None:
+            resumed = self._resume_point(last_event_id)
+            if resumed is None:
+                yield RESET_FRAME
+            else:
+                after = resumed
+        while not self._closing:
+            frames = self._since(after, event_id)
+            if frames is None:
+                after = self._seq
+                yield RESET_FRAME
+            elif frames:
+                after = frames[-1][0]
+                yield b"".join(frame for _, frame in frames)
+            else:
+                after, ticks = self._seq, self._ticks
+                await self._wait(event_id)
+                if self._ticks != ticks:
+                    yield KEEPALIVE_FRAME
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive)
+            self._ticks += 1
+            self._wake_all()
+
+    async def _send_notifications(self) -> None:
+        """Relay committed changes to the other workers with NOTIFY."""
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            while self._outbox:
+                batch = self._outbox[:MAX_NOTIFY_BATCH]
+                del self._outbox[:MAX_NOTIFY_BATCH]
+                try:
+                    async with get_async_engine().connect() as connection:
+                        await connection.execute(select(*(
+                            func.pg_notify(NOTIFY_CHANNEL, payload.decode())
+                            for payload in batch)))
+                        await connection.commit()
+                except (OSError, SQLAlchemyError):
+                    logger.exception("Could not relay %d changes to other workers", len(batch))
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        change = orjson.loads(payload)
+        if change.get("origin") != self.origin:
+            self.deliver(change)
+
+    async def _listen(self) -> None:
+        """LISTEN for other workers' changes, reconnecting when the connection drops."""
+        import asyncpg
+
+        dsn = make_url(settings.DATABASE_URL).set(
+            drivername="postgresql").render_as_string(hide_password=False)
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notification)
+                if connected_before:
+                    # Whatever was sent while disconnected is lost
+                    self.reset()
+                connected_before = True
+                while True:
+                    await asyncio.sleep(self.keepalive)
+                    await asyncio.wait_for(connection.execute("SELECT 1"), self.keepalive)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError,
+                    asyncpg.InterfaceError):
+                logger.warning("Change feed listener disconnected; reconnecting", exc_info=True)
+            finally:
+                if connection is not None:
+                    connection.terminate()
+            await asyncio.sleep(1.0)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.origin = f"{socket.gethostname()}.{os.getpid()}"
+        self._closing = False
+        self._tasks.append(asyncio.create_task(self._keepalive()))
+        if self.relay:
+            self._outbox_ready = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._send_notifications()))
+            self._tasks.append(asyncio.create_task(self._listen()))
+
+    async def stop(self) -> None:
+        self.close()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._outbox_ready = None
+
+    def render(self) -> str:
+        """Render the feed metrics in the Prometheus text format."""
+        return (
+            "# HELP kaigi_stream_subscribers Open change feed streams.\n"
+            "# TYPE kaigi_stream_subscribers gauge\n"
+            f"kaigi_stream_subscribers {self.subscribers}\n"
+            "# HELP kaigi_stream_changes_total Changes delivered to this worker's feed.\n"
+            "# TYPE kaigi_stream_changes_total counter\n"
+            f"kaigi_stream_changes_total {self.delivered}\n"
+        )
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,108 @@
+"""Indexed date-range queries over events.
+
+An event overlaps the window ``[start, end)`` when it starts before the
+window ends and ends after the window starts. How that is answered from
+an index depends on the backend:
+
+* PostgreSQL: a GiST index over ``tstzrange(start_time, end_time)``,
+  queried with the ``&&`` overlap operator. Unlike a B-tree, it stays
+  selective for any window however long the events are.
+* Others (SQLite): the plain comparison, served by the
+  ``(start_time, end_time)`` B-tree without touching the table rows.
+  SQLite keeps only the wall-clock time, stored in UTC (see
+  app.schemas.event), so bounds are converted to naive UTC first.
+"""
+import calendar
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, event, func, literal, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.event import Event
+
+# Must match the expression of ix_events_time_range exactly for the planner
+# to use the index. greatest() keeps a row whose end precedes its start
+# from failing the range constructor
+POSTGRES_RANGE_EXPRESSION = literal_column(
+    "tstzrange(events.start_time, greatest(events.start_time, events.end_time), '[]')"
+)
+
+POSTGRES_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_events_time_range ON events USING gist "
+    "(tstzrange(start_time, greatest(start_time, end_time), '[]'))",
+]
+
+
+def install_range_index(target, connection, **kw):
+    """Create the range index for the connection's dialect (idempotent)."""
+    if connection.dialect.name == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+
+
+# Databases created through Base.metadata.create_all get the index too
+event.listen(Event.__table__, "after_create", install_range_index)
+
+
+def _bound(value: datetime):
+    # Typed like the columns so drivers send a timestamptz, not a timestamp
+    return literal(value, Event.start_time.type)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite would compare the bound's wall clock, dropping its offset
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def apply_time_range(query, start: Optional[datetime], end: Optional[datetime],
+                     dialect: str):
+    """Filter an Event select to events overlapping ``[start, end)``.
+
+    Either bound may be None for a window open on that side.
+    """
+    if dialect == "postgresql":
+        # An exclusive lower bound gives the same answer as the comparisons
+        # below (an event ending exactly at ``start`` does not overlap); a
+        # NULL bound leaves the range open on that side
+        return query.where(POSTGRES_RANGE_EXPRESSION.op("&&")(
+            func.tstzrange(_bound(start), _bound(end), literal_column("'()'"))))
+    start, end = _naive_utc(start), _naive_utc(end)
+    if start is not None:
+        query = query.where(Event.end_time > start)
+    if end is not None:
+        query = query.where(Event.start_time < end)
+    return query
+
+
+async def count_events_per_day(
+    db: AsyncSession, year: int, month: int, utc_offset: timedelta
+) -> List[Tuple[date, int]]:
+    """Count the events overlapping each day of a month, in one query.
+
+    Days run midnight to midnight at ``utc_offset``; an event spanning
+    several days is counted on each of them. Days without events are
+    included with a count of zero.
+    """
+    tz = timezone(utc_offset)
+    days = [date(year, month, day) for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+    bounds = [datetime(d.year, d.month, d.day, tzinfo=tz) for d in days]
+    bounds.append(bounds[-1] + timedelta(days=1))
+    dialect = db.get_bind().dialect.name
+    if dialect != "postgresql":
+        bounds = [_naive_utc(value) for value in bounds]
+    edges = [_bound(value) for value in bounds]
+
+    # A single pass over the month's events with one conditional count per
+    # day. Joining a table of days instead makes the planner probe the
+    # index once per day, and a B-tree probe for "starts before the end of
+    # this day" is open-ended
+    query = select(*(
+        func.count(case(((Event.start_time < edges[i + 1]) & (Event.end_time > edges[i]), 1)))
+        for i in range(len(days))
+    ))
+    query = apply_time_range(query, bounds[0], bounds[-1], dialect)
+    counts = (await db.execute(query)).one()
+    return list(zip(days, counts))
@@ -1,14 +1,46 @@
-import httpx
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 from ..core.config import settings
-from ..schemas.event import Event
+from ..core.database import AsyncSessionLocal
+from ..models.notification import NotificationOutbox
 
+try:
+    import fcntl
+except ImportError:  # Windows: no dispatch lock, every worker dispatches
+    fcntl = None
 
-async def send_discord_notification(event: Event, action: str = "created"):
-    """Send a notification to Discord webhook."""
-    # Check if Discord webhook URL is configured
-    if not settings.DISCORD_WEBHOOK_URL:
-        return {"success": False, "message": "Discord webhook URL not configured"}
+if TYPE_CHECKING:
+    # httpx is imported on first dispatch; it is only needed when a webhook
+    # is configured and would otherwise add to every worker's cold start
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Discord accepts at most 10 embeds per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
 
+# Discord rejects embed field values longer than this
+MAX_FIELD_LENGTH = 1024
+
+# Outcomes of one webhook message
+SENT = "sent"
+RATE_LIMITED = "rate_limited"
+# 400: the payload itself is bad and would fail every time
+REJECTED = "rejected"
+# Network errors and other HTTP errors, retried with backoff
+FAILED = "failed"
+
+
+def build_discord_embed(event, action: str = "created") -> dict:
+    """Build the Discord embed announcing an event change."""
     # Create message content
     if action == "created":
         title = "🎉 New Event Created"
@@ -17,55 +49,312 @@ async def send_discord_notification(event: Event, action: str = "created"):
     else:
         title = "📅 Event Notification"
 
-    # Format the message
-    message = {
-        "username": "KaigiNote Bot",
-        "embeds": [
+    content = event.content or "No description provided"
+    return {
+        "title": title,
+        "color": 3447003,  # Blue color
+        "fields": [
+            {
+                "name": "Event",
+                "value": f"ID: {event.id}",
+                "inline": True
+            },
+            {
+                "name": "Date",
+                "value": event.start_time.strftime("%Y-%m-%d %H:%M"),
+                "inline": True
+            },
             {
-                "title": title,
-                "color": 3447003,  # Blue color
-                "fields": [
-                    {
-                        "name": "Event",
-                        "value": f"ID: {event.id}",
-                        "inline": True
-                    },
-                    {
-                        "name": "Date",
-                        "value": event.start_time.strftime("%Y-%m-%d %H:%M"),
-                        "inline": True
-                    },
-                    {
-                        "name": "Place",
-                        "value": event.place,
-                        "inline": True
-                    },
-                    {
-                        "name": "Content",
-                        "value": event.content or "No description provided",
-                        "inline": False
-                    },
-                    {
-                        "name": "Status",
-                        "value": event.status,
-                        "inline": True
-                    }
-                ],
-                "footer": {
-                    "text": "KaigiNote"
-                }
+                "name": "Place",
+                "value": event.place[:MAX_FIELD_LENGTH],
+                "inline": True
+            },
+            {
+                "name": "Content",
+                "value": content[:MAX_FIELD_LENGTH],
+                "inline": False
+            },
+            {
+                "name": "Status",
+                "value": event.status,
+                "inline": True
             }
-        ]
+        ],
+        "footer": {
+            "text": "KaigiNote"
+        }
     }
 
-    # Send the message to Discord
+
+def enqueue_discord_notification(db: AsyncSession, event, action: str = "created") -> None:
+    """Queue a notification in the caller's transaction.
+
+    The event must already be flushed so it has an id. Nothing is sent
+    until the transaction commits, and nothing is lost if the process
+    restarts afterwards.
+    """
+    if not settings.DISCORD_WEBHOOK_URL:
+        return
+    db.add(NotificationOutbox(payload=build_discord_embed(event, action)))
+
+
+def _retry_after(response: "httpx.Response") -> float:
+    """Seconds to wait after a 429, from the header or Discord's JSON body."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        try:
+            value = response.json().get("retry_after")
+        except ValueError:
+            value = None
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                settings.DISCORD_WEBHOOK_URL,
-                json=message
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class OutboxDispatcher:
+    """Delivers queued notifications to a Discord webhook.
+
+    Due rows are claimed in one short transaction and posted after it has
+    committed, so no lock is held while waiting on Discord; a claim lapses
+    after ``claim_timeout`` seconds if the process dies mid-delivery. One
+    keep-alive client is shared by every delivery, up to 10 embeds are
+    sent per webhook message, and 429s wait out Retry-After. When Discord
+    rejects a message (400), each of its rows is sent on its own, so only
+    the bad one is dead-lettered; other failures retry with exponential
+    backoff. Dead-lettered rows and rows that exhaust ``max_attempts``
+    stay in the table with their last error for inspection; sent rows are
+    deleted after ``sent_retention`` seconds.
+
+    On SQLite, which has no SKIP LOCKED and locks the whole database for
+    every write, only the worker holding a lock file next to the database
+    dispatches; another takes over when it exits.
+    """
+
+    def __init__(
+        self,
+        webhook_url: str,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        client: Optional["httpx.AsyncClient"] = None,
+        poll_interval: float = settings.DISCORD_POLL_INTERVAL,
+        max_attempts: int = settings.DISCORD_MAX_ATTEMPTS,
+        max_backoff: float = settings.DISCORD_MAX_BACKOFF,
+        sent_retention: float = settings.DISCORD_SENT_RETENTION,
+        prune_interval: float = settings.DISCORD_PRUNE_INTERVAL,
+        batch_delay: float = 0.5,
+        claim_timeout: float = 300.0,
+        database_url: str = settings.DATABASE_URL,
+    ):
+        self.webhook_url = webhook_url
+        self.session_factory = session_factory
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.sent_retention = sent_retention
+        self.prune_interval = prune_interval
+        self.batch_delay = batch_delay
+        self.claim_timeout = claim_timeout
+        self.database_url = database_url
+        self._rate_limited_for = 0.0
+        self._last_prune = 0.0
+        self._lock_file = None
+        self._owns_client = client is None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Wake the dispatcher after new rows were committed."""
+        self._wakeup.set()
+
+    async def dispatch_once(self) -> int:
+        """Send one batch of due notifications; return how many were delivered."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        deliveries = [(rows, *await self._post(rows))]
+        if deliveries[0][1] == REJECTED and len(rows) > 1:
+            # Discord rejects the whole message for one bad embed; send each
+            # row on its own to find it
+            deliveries = []
+            for index, row in enumerate(rows):
+                outcome, error = await self._post([row])
+                deliveries.append(([row], outcome, error))
+                if outcome == RATE_LIMITED:
+                    deliveries.append((rows[index + 1:], RATE_LIMITED, None))
+                    break
+
+        await self._record(deliveries)
+        return sum(len(rows) for rows, outcome, _ in deliveries if outcome == SENT)
+
+    async def _claim(self) -> list:
+        """Claim up to one message worth of due rows, oldest first."""
+        now = datetime.now(timezone.utc)
+        due = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.sent_at.is_(None),
+                NotificationOutbox.attempts < self.max_attempts,
+                NotificationOutbox.next_attempt_at <= now,
+                or_(NotificationOutbox.claimed_until.is_(None),
+                    NotificationOutbox.claimed_until <= now),
+            )
+            .order_by(NotificationOutbox.id)
+            .limit(MAX_EMBEDS_PER_MESSAGE)
+            # Lets several workers claim without taking the same row
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(due))
+                .values(claimed_until=now + timedelta(seconds=self.claim_timeout))
+                .returning(NotificationOutbox.id, NotificationOutbox.payload,
+                           NotificationOutbox.attempts)
+                .execution_options(synchronize_session=False)
             )
-            response.raise_for_status()
-        return {"success": True, "message": "Notification sent to Discord"}
-    except Exception as e:
-        return {"success": False, "message": f"Failed to send Discord notification: {str(e)}"}
+            rows = sorted(result.all(), key=lambda row: row.id)
+            await db.commit()
+        return rows
+
+    async def _post(self, rows) -> Tuple[str, Optional[str]]:
+        """Send rows as one webhook message; return the outcome and any error."""
+        import httpx
+
+        message = {
+            "username": "KaigiNote Bot",
+            "embeds": [row.payload for row in rows],
+        }
+        try:
+            response = await self.client.post(self.webhook_url, json=message)
+        except httpx.HTTPError as e:
+            return FAILED, f"{type(e).__name__}: {e}"
+        if response.status_code == 429:
+            # The whole webhook pauses rather than just this batch
+            self._rate_limited_for = _retry_after(response)
+            return RATE_LIMITED, None
+        if response.is_error:
+            error = f"HTTP {response.status_code}: {response.text[:500]}"
+            return (REJECTED if response.status_code == 400 else FAILED), error
+        return SENT, None
+
+    async def _record(self, deliveries) -> None:
+        """Store the outcome of each delivery and release the claims."""
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            for rows, outcome, error in deliveries:
+                if not rows:
+                    continue
+                ids = [row.id for row in rows]
+                if outcome == SENT:
+                    await db.execute(
+                        update(NotificationOutbox).where(NotificationOutbox.id.in_(ids))
+                        .values(sent_at=now, claimed_until=None))
+                elif outcome == RATE_LIMITED:
+                    # Not the rows' fault, so no attempt is counted
+                    retry_at = now + timedelta(seconds=self._rate_limited_for)
+                    await db.execute(
+                        update(NotificationOutbox).where(NotificationOutbox.id.in_(ids))
+                        .values(next_attempt_at=retry_at, claimed_until=None))
+                else:
+                    for row in rows:
+                        await db.execute(
+                            update(NotificationOutbox).where(NotificationOutbox.id == row.id)
+                            .values(**self._failure(row, outcome, error, now)))
+                    if outcome == REJECTED:
+                        logger.error("Discord rejected notification %s, giving up: %s",
+                                     ids, error)
+                    else:
+                        logger.warning("Discord notification failed, will retry: %s", error)
+            await db.commit()
+
+    def _failure(self, row, outcome: str, error: str, now: datetime) -> dict:
+        # A rejected payload fails the same way every time: dead-letter it
+        attempts = self.max_attempts if outcome == REJECTED else row.attempts + 1
+        backoff = min(2 ** attempts, self.max_backoff)
+        return {
+            "attempts": attempts,
+            "last_error": error,
+            "next_attempt_at": now + timedelta(seconds=backoff),
+            "claimed_until": None,
+        }
+
+    async def prune(self) -> int:
+        """Delete rows sent more than ``sent_retention`` seconds ago."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.sent_retention)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(NotificationOutbox).where(NotificationOutbox.sent_at < cutoff))
+            await db.commit()
+        self._last_prune = time.monotonic()
+        return result.rowcount
+
+    def _holds_dispatch_lock(self) -> bool:
+        """Whether this worker may dispatch (always, except on SQLite files)."""
+        if self._lock_file is not None or fcntl is None:
+            return True
+        url = make_url(self.database_url)
+        if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+            return True
+        lock_file = open(f"{url.database}.discord.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def run(self) -> None:
+        """Deliver notifications until cancelled."""
+        while True:
+            if not self._holds_dispatch_lock():
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    await self.prune()
+                sent = await self.dispatch_once()
+            except Exception:
+                logger.exception("Discord outbox dispatch failed")
+                sent = 0
+            if self._rate_limited_for:
+                await asyncio.sleep(self._rate_limited_for)
+                self._rate_limited_for = 0.0
+                continue
+            if sent:
+                # Drain any backlog before sleeping
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                continue
+            # Give concurrent writes a moment to land in the same message
+            await asyncio.sleep(self.batch_delay)
+
+    def start(self) -> None:
+        if self._task is None:
+            if self.client is None:
+                import httpx
+                self.client = httpx.AsyncClient(timeout=10.0)
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        if self._owns_client and self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+discord_dispatcher = OutboxDispatcher(settings.DISCORD_WEBHOOK_URL)
@@ -0,0 +1,106 @@
+"""Indexed keyword search over event title, place and content.
+
+Japanese text has no word separators, so both backends index character
+trigrams rather than words:
+
+* PostgreSQL: a pg_trgm GIN index over the concatenated columns, queried
+  with ILIKE and ranked by ``word_similarity``.
+* SQLite: an external-content FTS5 table with the ``trigram`` tokenizer,
+  kept in sync by triggers and ranked by bm25.
+
+Keywords shorter than three characters cannot use a trigram index and fall
+back to a plain substring scan.
+"""
+import sqlite3
+
+from sqlalchemy import column, event, func, literal_column, or_, table, text
+
+from ..models.event import Event
+
+# Shortest keyword a trigram index can answer
+MIN_TRIGRAM_LENGTH = 3
+
+# FTS5's trigram tokenizer needs SQLite 3.34+
+SQLITE_TRIGRAM_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+# Must match the expression of ix_events_search_trgm exactly for the
+# planner to use the index
+POSTGRES_SEARCH_EXPRESSION = literal_column(
+    "(coalesce(events.title, '') || ' ' || coalesce(events.place, '')"
+    " || ' ' || coalesce(events.content, ''))"
+)
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_events_search_trgm ON events USING gin "
+    "((coalesce(title, '') || ' ' || coalesce(place, '') || ' ' || coalesce(content, ''))"
+    " gin_trgm_ops)",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "title, place, content, content='events', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, title, place, content) "
+    "VALUES (new.id, new.title, new.place, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, place, content) "
+    "VALUES ('delete', old.id, old.title, old.place, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, place, content ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, title, place, content) "
+    "VALUES ('delete', old.id, old.title, old.place, old.content); "
+    "INSERT INTO events_fts(rowid, title, place, content) "
+    "VALUES (new.id, new.title, new.place, new.content); END",
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+]
+
+events_fts = table("events_fts", column("rowid"), column("rank"))
+
+
+def install_search_index(target, connection, **kw):
+    """Create the search index for the connection's dialect (idempotent)."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        statements = POSTGRES_DDL
+    elif dialect == "sqlite" and SQLITE_TRIGRAM_AVAILABLE:
+        statements = SQLITE_DDL
+    else:
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+# Databases created through Base.metadata.create_all get the index too
+event.listen(Event.__table__, "after_create", install_search_index)
+
+
+def _substring_filter(query, keyword: str):
+    return query.where(or_(
+        Event.title.contains(keyword, autoescape=True),
+        Event.place.contains(keyword, autoescape=True),
+        Event.content.contains(keyword, autoescape=True),
+    ))
+
+
+def apply_keyword_search(query, keyword: str, dialect: str):
+    """Filter an Event select by keyword and order it by relevance."""
+    if len(keyword) < MIN_TRIGRAM_LENGTH:
+        return _substring_filter(query, keyword)
+
+    if dialect == "postgresql":
+        return query.where(
+            POSTGRES_SEARCH_EXPRESSION.icontains(keyword, autoescape=True)
+        ).order_by(
+            func.word_similarity(keyword, POSTGRES_SEARCH_EXPRESSION).desc()
+        )
+
+    if dialect == "sqlite" and SQLITE_TRIGRAM_AVAILABLE:
+        # Quote as an FTS5 phrase so the keyword is matched literally
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        return query.join(
+            events_fts, events_fts.c.rowid == Event.id
+        ).where(
+            literal_column("events_fts").op("MATCH")(phrase)
+        ).order_by(events_fts.c.rank)
+
+    return _substring_filter(query, keyword)
@@ -0,0 +1,6 @@
+"""Benchmarks for the KaigiNote API.
+
+Run from the backend directory, e.g. ``python -m benchmarks.db_paths``.
+Point ``DATABASE_URL`` at a local PostgreSQL for representative numbers;
+the default SQLite file is fine for a quick smoke run.
+"""
@@ -0,0 +1,145 @@
+"""Concurrent joins against a capacity-limited event.
+
+Creates an event with ``--seats`` seats and ``--joins`` users, then has
+every user join at the same moment through the API. Checks that exactly
+``--seats`` participants end up confirmed, that the rest are waitlisted,
+that ``participant_count`` agrees with the rows, and reports throughput.
+Also exercises the bulk endpoint and the waitlist promotion on delete.
+Exits non-zero on any mismatch.
+
+    python -m benchmarks.capacity_race --joins 1000 --seats 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Event, EventParticipant, User
+from app.models.participant import CONFIRMED, WAITLISTED
+
+
+def seed(joins: int, seats: int, run_id: int):
+    """Create ``joins`` users and an event with ``seats`` seats."""
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        users = [User(name=f"race {i}", email=f"race-{run_id}-{i}@example.com",
+                      password_hash="x") for i in range(joins)]
+        start = datetime(2027, 6, 1, 19)
+        event = Event(title="満員御礼", start_time=start, end_time=start + timedelta(hours=2),
+                      place="Tokyo", max_participants=seats)
+        db.add_all(users + [event])
+        db.commit()
+        return event.id, [user.id for user in users]
+
+
+def enrollment(event_id: int):
+    """(confirmed rows, waitlisted rows, participant_count) of an event."""
+    with SessionLocal() as db:
+        statuses = dict(db.execute(
+            select(EventParticipant.enrollment_status, func.count())
+            .where(EventParticipant.event_id == event_id)
+            .group_by(EventParticipant.enrollment_status)).all())
+        count = db.execute(
+            select(Event.participant_count).where(Event.id == event_id)).scalar_one()
+    return statuses.get(CONFIRMED, 0), statuses.get(WAITLISTED, 0), count
+
+
+def check(label: str, actual, expected) -> bool:
+    ok = actual == expected
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {actual}" + ("" if ok else f" (expected {expected})"))
+    return ok
+
+
+async def run(args) -> bool:
+    ok = True
+    run_id = time.time_ns()
+    event_id, user_ids = seed(args.joins, args.seats, run_id)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_ids[0])})}"}
+    limits = httpx.Limits(max_connections=None)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 limits=limits, timeout=None) as client:
+        gate = asyncio.Event()
+        statuses = Counter()
+
+        async def join(user_id: int):
+            await gate.wait()
+            response = await client.post(
+                f"/api/events/{event_id}/participants",
+                json={"user_id": user_id}, headers=headers)
+            if response.status_code == 200:
+                statuses[response.json()["enrollment_status"]] += 1
+            else:
+                statuses[response.status_code] += 1
+
+        tasks = [asyncio.create_task(join(user_id)) for user_id in user_ids]
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        gate.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        print(f"{args.joins} simultaneous joins in {elapsed:.2f}s "
+              f"({args.joins / elapsed:.0f} joins/s): {dict(statuses)}")
+
+        waitlisted = args.joins - args.seats
+        ok &= check("confirmed (rows, responses)",
+                    (enrollment(event_id)[0], statuses[CONFIRMED]), (args.seats, args.seats))
+        ok &= check("waitlisted", enrollment(event_id)[1], waitlisted)
+        ok &= check("participant_count", enrollment(event_id)[2], args.seats)
+
+        # Freeing a seat confirms the earliest waitlisted participant
+        response = await client.get(f"/api/events/{event_id}/participants", headers=headers)
+        rows = response.json()
+        leaving = next(row for row in rows if row["enrollment_status"] == CONFIRMED)
+        first_waiting = min(
+            (row for row in rows if row["enrollment_status"] == WAITLISTED),
+            key=lambda row: row["id"], default=None)
+        await client.delete(
+            f"/api/events/{event_id}/participants/{leaving['id']}", headers=headers)
+        confirmed_after, _, count_after = enrollment(event_id)
+        ok &= check("after a confirmed participant leaves (confirmed, count)",
+                    (confirmed_after, count_after), (args.seats, args.seats))
+        if first_waiting is not None:
+            response = await client.get(f"/api/events/{event_id}/participants", headers=headers)
+            promoted = next(row for row in response.json() if row["id"] == first_waiting["id"])
+            ok &= check("earliest waitlisted promoted", promoted["enrollment_status"], CONFIRMED)
+
+        # Raising the limit confirms waitlisted participants into the new seats
+        await client.put(f"/api/events/{event_id}", headers=headers,
+                         json={"max_participants": args.seats + 10})
+        ok &= check("after raising the limit by 10 (confirmed, count)",
+                    enrollment(event_id)[::2], (args.seats + 10, args.seats + 10))
+
+        # Bulk enrollment waitlists whatever does not fit
+        bulk_event, bulk_users = seed(args.seats * 2, args.seats, run_id + 1)
+        started = time.perf_counter()
+        response = await client.post(
+            f"/api/events/{bulk_event}/participants/bulk", headers=headers,
+            json=[{"user_id": user_id} for user_id in bulk_users])
+        elapsed = time.perf_counter() - started
+        bulk = Counter(item["status"] for item in response.json())
+        print(f"bulk enrollment of {len(bulk_users)} in {elapsed * 1000:.1f} ms: {dict(bulk)}")
+        ok &= check("bulk (confirmed, waitlisted, count)", enrollment(bulk_event),
+                    (args.seats, args.seats, args.seats))
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--joins", type=int, default=1000)
+    parser.add_argument("--seats", type=int, default=100)
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
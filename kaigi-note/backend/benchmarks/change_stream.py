@@ -0,0 +1,238 @@
+"""Idle cost and fan-out of the server-sent change feed.
+
+Starts ``python -m app.serve`` with one worker on a temporary SQLite
+database and opens ``--subscribers`` streams to ``/api/events/stream``
+over real sockets: most unscoped, a tenth scoped to event A and a tenth
+to event B. Reports the worker's memory per stream and its CPU use while
+they sit idle (with a keepalive every ``--keepalive`` seconds), then
+checks that
+
+- creating an event reaches every unscoped stream, and how fast;
+- a participant joining A reaches the A streams and no B stream;
+- SIGTERM ends every stream and the worker exits promptly.
+
+Exits non-zero on any failure.
+
+    python -m benchmarks.change_stream --subscribers 2000
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.serve_lifecycle import free_port, wait_until_up
+
+PASSWORD = "stream-password"
+
+
+def worker_pid(master: int) -> int:
+    with open(f"/proc/{master}/task/{master}/children") as f:
+        return int(f.read().split()[0])
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("no VmRSS")
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime, in clock ticks
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Stream:
+    """One raw HTTP/1.1 connection reading the feed."""
+
+    def __init__(self, port: int, token: str, event_id=None):
+        self.port = port
+        self.token = token
+        self.path = "/api/events/stream" + (f"?event_id={event_id}" if event_id else "")
+        self.data = b""
+        self.changed = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.seen_at = {}
+
+    async def open(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.writer.write(
+            f"GET {self.path} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n"
+            f"Authorization: Bearer {self.token}\r\n\r\n".encode())
+        while b"retry:" not in self.data:
+            chunk = await self.reader.read(4096)
+            if not chunk:
+                raise RuntimeError(f"stream closed before it started: {self.data[:200]!r}")
+            self.data += chunk
+        if not self.data.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(self.data[:200])
+        self.task = asyncio.create_task(self.read())
+
+    async def read(self) -> None:
+        while True:
+            chunk = await self.reader.read(4096)
+            if not chunk:
+                self.closed.set()
+                return
+            self.data += chunk
+            for kind in (b"event.created", b"participant.created"):
+                if kind in chunk and kind not in self.seen_at:
+                    self.seen_at[kind] = time.perf_counter()
+            self.changed.set()
+
+
+def check(label: str, ok: bool, detail) -> bool:
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {detail}")
+    return ok
+
+
+async def run(args) -> bool:
+    ok = True
+    workdir = tempfile.mkdtemp(prefix="kaigi-stream-")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'stream.db')}",
+        "DB_STARTUP_MODE": "create",
+        "MIGRATE_ON_START": "false",
+        "PORT": str(port),
+        "WEB_CONCURRENCY": "1",
+        "STREAM_KEEPALIVE_SECONDS": str(args.keepalive),
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    log = open(os.path.join(workdir, "server.log"), "w")
+    server = subprocess.Popen([sys.executable, "-m", "app.serve"],
+                              env=env, stdout=log, stderr=subprocess.STDOUT)
+    streams = []
+    try:
+        await asyncio.to_thread(wait_until_up, base_url, server)
+        worker = worker_pid(server.pid)
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            response = await client.post("/api/auth/register", json={
+                "name": "stream", "email": "stream@example.com", "password": PASSWORD})
+            user_id = response.json()["id"]
+            response = await client.post("/api/auth/login", data={
+                "username": "stream@example.com", "password": PASSWORD})
+            token = response.json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            event_ids = []
+            for place in ("A", "B"):
+                response = await client.post("/api/events/", headers=headers, json={
+                    "start_time": "2027-05-01T10:00:00", "end_time": "2027-05-01T12:00:00",
+                    "place": place, "content": "stream check"})
+                event_ids.append(response.json()["id"])
+            event_a, event_b = event_ids
+
+            # Let the worker settle before measuring
+            await client.get("/")
+            await asyncio.sleep(1)
+            rss_before = rss_kib(worker)
+
+            scoped = args.subscribers // 10
+            streams_a = [Stream(port, token, event_a) for _ in range(scoped)]
+            streams_b = [Stream(port, token, event_b) for _ in range(scoped)]
+            streams_all = [Stream(port, token) for _ in range(args.subscribers - 2 * scoped)]
+            streams = streams_all + streams_a + streams_b
+            started = time.perf_counter()
+            for i in range(0, len(streams), 100):
+                await asyncio.gather(*(stream.open() for stream in streams[i:i + 100]))
+            print(f"opened {len(streams)} streams in {time.perf_counter() - started:.2f}s "
+                  f"({len(streams_all)} all, {scoped} on A, {scoped} on B)")
+
+            await asyncio.sleep(1)
+            rss_after = rss_kib(worker)
+            print(f"worker RSS {rss_before / 1024:.1f} -> {rss_after / 1024:.1f} MiB, "
+                  f"{(rss_after - rss_before) / len(streams):.1f} KiB per stream")
+
+            cpu_before = cpu_seconds(worker)
+            await asyncio.sleep(args.idle_seconds)
+            idle_cpu = (cpu_seconds(worker) - cpu_before) / args.idle_seconds
+            ok &= check("worker CPU while idle", idle_cpu < args.max_idle_cpu,
+                        f"{idle_cpu * 100:.1f}% of a core "
+                        f"(keepalive every {args.keepalive:g}s)")
+
+            # A new event reaches every unscoped stream
+            sent = time.perf_counter()
+            await client.post("/api/events/", headers=headers, json={
+                "start_time": "2027-06-01T10:00:00", "end_time": "2027-06-01T12:00:00",
+                "place": "C", "content": "fan-out"})
+            await asyncio.wait_for(asyncio.gather(*(
+                wait_for(stream, b"event.created") for stream in streams_all)), 30)
+            latencies = sorted(stream.seen_at[b"event.created"] - sent for stream in streams_all)
+            ok &= check("event.created delivered", True,
+                        f"all {len(streams_all)} streams, p50 "
+                        f"{latencies[len(latencies) // 2] * 1000:.1f} ms, "
+                        f"last {latencies[-1] * 1000:.1f} ms after the POST")
+            ok &= check("scoped streams skipped it",
+                        not any(b"event.created" in s.data for s in streams_a + streams_b),
+                        "no event.created on A or B streams")
+
+            # A participant joining A reaches A's streams only
+            await client.post(f"/api/events/{event_a}/participants", headers=headers,
+                              json={"user_id": user_id})
+            await asyncio.wait_for(asyncio.gather(*(
+                wait_for(stream, b"participant.created") for stream in streams_a)), 30)
+            await asyncio.sleep(0.5)
+            ok &= check("participant.created delivered on A",
+                        all(b"participant.created" in s.data for s in streams_a),
+                        f"{len(streams_a)} streams")
+            ok &= check("B streams untouched",
+                        not any(b"participant.created" in s.data for s in streams_b),
+                        f"{len(streams_b)} streams")
+
+            metrics = (await client.get("/metrics")).text
+            print("".join(line + "\n" for line in metrics.splitlines()
+                          if line.startswith("kaigi_stream")), end="")
+
+        # SIGTERM ends the streams instead of waiting on them
+        signalled = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        await asyncio.wait_for(
+            asyncio.gather(*(stream.closed.wait() for stream in streams)), 30)
+        closed = time.perf_counter() - signalled
+        await asyncio.to_thread(server.wait, 30)
+        ok &= check("SIGTERM closed every stream", True,
+                    f"in {closed:.2f}s, server exited {server.returncode} after "
+                    f"{time.perf_counter() - signalled:.2f}s")
+    except asyncio.TimeoutError:
+        ok &= check("timed out", False, f"server log in {workdir}")
+    finally:
+        for stream in streams:
+            if hasattr(stream, "writer"):
+                stream.writer.close()
+        if server.poll() is None:
+            server.kill()
+        log.close()
+    return ok
+
+
+async def wait_for(stream: Stream, kind: bytes) -> None:
+    while kind not in stream.seen_at:
+        stream.changed.clear()
+        await stream.changed.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--keepalive", type=float, default=1.0)
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--max-idle-cpu", type=float, default=0.25,
+                        help="fail above this fraction of a core while idle")
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Bandwidth and CPU saved by ETags on an unchanged event listing.
+
+Polls ``GET /api/events?limit=100`` repeatedly, first unconditionally and
+then with the ETag from the previous response in If-None-Match, and
+reports bytes transferred and process CPU time per request.
+
+    python -m benchmarks.conditional_get --requests 500
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Event, User
+
+
+def seed(events: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(name="etag bench", email=f"etag-{time.time_ns()}@example.com",
+                    password_hash="x")
+        db.add(user)
+        existing = db.execute(select(func.count(Event.id))).scalar_one()
+        start = datetime(2024, 1, 1)
+        db.add_all(
+            Event(title=f"Event {i}", start_time=start + timedelta(hours=i),
+                  end_time=start + timedelta(hours=i + 2), place="Tokyo",
+                  content="勉強会のお知らせ " * 10)
+            for i in range(existing, events)
+        )
+        db.commit()
+        return user.id
+
+
+async def poll(client: httpx.AsyncClient, headers: dict, requests: int, conditional: bool) -> tuple:
+    etag = None
+    transferred = 0
+    statuses = set()
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_headers = dict(headers)
+        if conditional and etag:
+            request_headers["If-None-Match"] = etag
+        response = await client.get("/api/events/", params={"limit": 100}, headers=request_headers)
+        etag = response.headers.get("ETag", etag)
+        transferred += len(response.content)
+        statuses.add(response.status_code)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    return transferred / requests, cpu / requests, elapsed / requests, sorted(statuses)
+
+
+async def run(user_id: int, requests: int) -> None:
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": str(user_id)})}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/events/", headers=headers)
+        for label, conditional in (("unconditional", False), ("If-None-Match", True)):
+            size, cpu, latency, statuses = await poll(client, headers, requests, conditional)
+            print(f"{label:>14}  {size:9.0f} bytes/req  {cpu * 1000:7.3f} ms CPU/req  "
+                  f"{latency * 1000:7.3f} ms/req  statuses {statuses}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    user_id = seed(args.events)
+    asyncio.run(run(user_id, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare the sync (threadpool) and async (asyncpg/aiosqlite) DB paths.
+
+Both endpoints run the same event listing query; one is a plain ``def``
+handler on ``get_db`` and the other an ``async def`` handler on
+``get_async_db``. Requests are driven in-process through httpx's ASGI
+transport at the same concurrency.
+
+    python -m benchmarks.db_paths --concurrency 100 --requests 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, SessionLocal, engine, get_async_db, get_db
+from app.models import Event
+
+LISTING = select(Event).order_by(Event.start_time.desc()).limit(20)
+
+app = FastAPI()
+
+
+@app.get("/sync")
+def sync_events(db: Session = Depends(get_db)):
+    return len(db.execute(LISTING).scalars().all())
+
+
+@app.get("/async")
+async def async_events(db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(LISTING)
+    return len(result.scalars().all())
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        existing = db.execute(select(func.count(Event.id))).scalar_one()
+        start = datetime(2024, 1, 1)
+        db.add_all(
+            Event(
+                title=f"Event {i}",
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i + 2),
+                place="Tokyo",
+                content="benchmark",
+            )
+            for i in range(existing, rows)
+        )
+        db.commit()
+
+
+async def drive(path: str, concurrency: int, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    remaining = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def run(concurrency: int, requests: int) -> None:
+    # A single event loop throughout: asyncpg connections are loop-bound
+    for path in ("/sync", "/async"):
+        # Warm up the connection pool before measuring
+        await drive(path, concurrency, concurrency)
+        stats = await drive(path, concurrency, requests)
+        print(
+            f"{stats['path']:>7}  {stats['rps']:8.1f} req/s  "
+            f"p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    asyncio.run(run(args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
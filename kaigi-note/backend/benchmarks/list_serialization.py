@@ -0,0 +1,118 @@
+"""Microbenchmark: ORM + pydantic listing vs Core rows + orjson.
+
+Times one 100-row page of each list endpoint both ways, including the
+query, and checks the two encodings are byte-identical:
+
+* before: ORM entities, validated through response_model (pydantic
+  orm_mode), jsonable_encoder, stdlib json via JSONResponse
+* after: the response columns as Core rows, encoded by rows_response
+
+    python -m benchmarks.list_serialization --rounds 200
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import parse_obj_as
+from sqlalchemy import func, select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.responses import rows_response
+from app.models import Event, EventParticipant, User
+from app.routers.events import EVENT_COLUMNS
+from app.routers.participants import PARTICIPANT_WITH_USER_COLUMNS
+from app.routers.users import USER_COLUMNS
+from app.schemas.event import Event as EventSchema
+from app.schemas.participant import ParticipantWithUser
+from app.schemas.user import User as UserSchema
+
+PAGE = 100
+
+
+def seed() -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        users = [User(name=f"ユーザー {i}", email=f"ser-{i}-{time.time_ns()}@example.com",
+                      password_hash="x") for i in range(PAGE)]
+        start = datetime(2024, 1, 1)
+        event = Event(title="Serialization", start_time=start,
+                      end_time=start + timedelta(hours=2), place="東京", content="勉強会")
+        db.add_all(users + [event])
+        db.flush()
+        db.add_all(EventParticipant(event_id=event.id, user_id=user.id, paid_amount=500)
+                   for user in users)
+        if db.execute(select(func.count(Event.id))).scalar_one() < PAGE:
+            db.add_all(Event(title=f"Event {i}", start_time=start + timedelta(hours=i),
+                             end_time=start + timedelta(hours=i + 2), place="大阪",
+                             content="もくもく会 " * 5) for i in range(PAGE))
+        db.commit()
+        return event.id
+
+
+def cases(event_id: int) -> dict:
+    participants_orm = select(
+        EventParticipant, User.name.label("user_name")
+    ).join(User, EventParticipant.user_id == User.id).where(
+        EventParticipant.event_id == event_id)
+
+    def participants_before(db):
+        return [
+            {**{c.name: getattr(p, c.name) for c in EventParticipant.__table__.columns},
+             "user_name": user_name}
+            for p, user_name in db.execute(participants_orm)
+        ]
+
+    return {
+        "events": (
+            List[EventSchema],
+            lambda db: db.execute(
+                select(Event).order_by(Event.start_time.desc()).limit(PAGE)).scalars().all(),
+            select(*EVENT_COLUMNS).order_by(Event.start_time.desc()).limit(PAGE),
+        ),
+        "users": (
+            List[UserSchema],
+            lambda db: db.execute(select(User).order_by(User.id).limit(PAGE)).scalars().all(),
+            select(*USER_COLUMNS).order_by(User.id).limit(PAGE),
+        ),
+        "participants": (
+            List[ParticipantWithUser],
+            participants_before,
+            select(*PARTICIPANT_WITH_USER_COLUMNS).join(
+                User, EventParticipant.user_id == User.id).where(
+                EventParticipant.event_id == event_id),
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    event_id = seed()
+    with SessionLocal() as db:
+        for name, (response_type, load_orm, core_statement) in cases(event_id).items():
+            def before():
+                content = jsonable_encoder(parse_obj_as(response_type, load_orm(db)))
+                return JSONResponse(content).body
+
+            def after():
+                return rows_response(db.execute(core_statement).all()).body
+
+            assert before() == after(), f"{name}: encodings differ"
+            timings = {}
+            for label, func in (("before", before), ("after", after)):
+                started = time.perf_counter()
+                for _ in range(args.rounds):
+                    func()
+                timings[label] = (time.perf_counter() - started) / args.rounds
+            print(f"{name:>12}  before {timings['before'] * 1000:7.3f} ms  "
+                  f"after {timings['after'] * 1000:7.3f} ms  "
+                  f"speedup {timings['before'] / timings['after']:5.1f}x  (byte-identical)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""Load benchmark: every API route, in-process, against a realistic dataset.
+
+Seed the database once (100k events, 1M participants, 10k users by
+default; ``--scale`` shrinks it for a quick run), then drive each route
+through an ASGI transport and record throughput and p50/p95/p99 latency
+per endpoint. Results are saved as JSON, and a later run can be compared
+against a stored baseline:
+
+    python -m benchmarks.load seed
+    python -m benchmarks.load run --concurrency 16 --requests 200 --save baseline.json
+    python -m benchmarks.load run --concurrency 16 --requests 200 --save after.json --baseline baseline.json
+    python -m benchmarks.load compare baseline.json after.json --threshold 0.15
+"""
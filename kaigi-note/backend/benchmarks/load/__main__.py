@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from . import __doc__ as DOC
+
+
+def seed_command(args) -> None:
+    from .seed import EVENTS, PARTICIPANTS, USERS, seed
+
+    counts = seed(
+        users=int(USERS * args.scale),
+        events=int(EVENTS * args.scale),
+        participants=int(PARTICIPANTS * args.scale),
+    )
+    print(", ".join(f"{table} {count}" for table, count in counts.items()))
+
+
+def run_command(args) -> None:
+    # Measure the handlers, not 429s from the login and register limiters
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from app.main import app
+
+    from .compare import compare
+    from .runner import run
+    from .scenarios import SCENARIOS, uncovered_routes
+
+    scenarios = [
+        s for s in SCENARIOS
+        if (not args.only or any(s.name.startswith(prefix) for prefix in args.only))
+        and (args.heavy or not s.heavy)
+    ]
+    for route in uncovered_routes(app):
+        print(f"warning: no scenario covers {route}", file=sys.stderr)
+
+    document = asyncio.run(run(scenarios, args.requests, args.concurrency, args.warmup))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(document, f, indent=2, ensure_ascii=False)
+        print(f"saved {args.save}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(json.load(f), document, args.threshold):
+                sys.exit(1)
+
+
+def compare_command(args) -> None:
+    from .compare import compare
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if compare(baseline, current, args.threshold):
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=DOC.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=DOC.split("\n\n", 1)[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="top the database up to the dataset size")
+    seed_parser.add_argument("--scale", type=float, default=1.0,
+                             help="fraction of 100k events / 1M participants / 10k users")
+    seed_parser.set_defaults(func=seed_command)
+
+    run_parser = commands.add_parser("run", help="drive every route and report latencies")
+    run_parser.add_argument("--requests", type=int, default=200,
+                            help="timed requests per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--warmup", type=int, default=5)
+    run_parser.add_argument("--only", nargs="*", metavar="PREFIX",
+                            help="run scenarios whose name starts with PREFIX, e.g. events.")
+    run_parser.add_argument("--heavy", action="store_true",
+                            help="include full-table exports")
+    run_parser.add_argument("--save", metavar="PATH", help="write results JSON here")
+    run_parser.add_argument("--baseline", metavar="PATH",
+                            help="compare against this results JSON; exit 1 on regression")
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+    run_parser.set_defaults(func=run_command)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="allowed fractional change before flagging")
+    compare_parser.set_defaults(func=compare_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Compare a results document against a stored baseline."""
+from typing import Dict, List
+
+# Latency changes smaller than this are noise, whatever the ratio
+MIN_DELTA_MS = 1.0
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.1) -> List[str]:
+    """Print a per-endpoint comparison and return the regressions found.
+
+    An endpoint regresses when its p95 latency grows, or its throughput
+    drops, by more than ``threshold`` (a fraction), or when it starts
+    returning unexpected statuses.
+    """
+    regressions = []
+    print(f"{'endpoint':<24} {'p50 ms':>20} {'p95 ms':>20} {'req/s':>20}")
+    for name, after in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<24} (not in baseline)")
+            continue
+
+        problems = []
+        p95_delta = after["p95_ms"] - before["p95_ms"]
+        if _change(before["p95_ms"], after["p95_ms"]) > threshold and p95_delta > MIN_DELTA_MS:
+            problems.append(f"p95 +{_change(before['p95_ms'], after['p95_ms']):.0%}")
+        if _change(before["throughput_rps"], after["throughput_rps"]) < -threshold:
+            problems.append(
+                f"throughput {_change(before['throughput_rps'], after['throughput_rps']):.0%}")
+        if after["errors"] > before["errors"]:
+            problems.append(f"errors {before['errors']} -> {after['errors']}")
+
+        print(f"{name:<24} "
+              f"{before['p50_ms']:8.2f} -> {after['p50_ms']:8.2f} "
+              f"{before['p95_ms']:8.2f} -> {after['p95_ms']:8.2f} "
+              f"{before['throughput_rps']:8.1f} -> {after['throughput_rps']:8.1f}"
+              + (f"  REGRESSION: {', '.join(problems)}" if problems else ""))
+        regressions.extend(f"{name}: {problem}" for problem in problems)
+
+    for name in baseline["results"].keys() - current["results"].keys():
+        print(f"{name:<24} (missing from this run)")
+    return regressions
@@ -0,0 +1,109 @@
+"""Drive scenarios through an in-process ASGI transport and collect latencies."""
+import asyncio
+import platform
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+
+import httpx
+
+from app.core.database import get_engine
+from app.main import app
+
+from .scenarios import Context, Scenario
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: Context, scenario: Scenario,
+                       requests: int, concurrency: int, warmup: int) -> Dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def issue(record: bool) -> None:
+        state = await scenario.prepare(client, ctx) if scenario.prepare else None
+        started = time.perf_counter()
+        response = await scenario.call(client, ctx, state)
+        elapsed = time.perf_counter() - started
+        if record:
+            latencies.append(elapsed)
+            statuses[response.status_code] += 1
+
+    for _ in range(warmup):
+        await issue(record=False)
+
+    # Workers share one iterator, so exactly `requests` calls are made
+    pending = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in pending:
+            await issue(record=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    errors = sum(n for code, n in statuses.items() if code not in scenario.expected)
+    return {
+        "route": scenario.route,
+        "requests": len(ordered),
+        "errors": errors,
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        # Includes untimed prepare steps, so it understates e.g. deletes
+        "throughput_rps": len(ordered) / wall if wall else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+async def run(scenarios: Sequence[Scenario], requests: int, concurrency: int,
+              warmup: int) -> Dict:
+    """Run each scenario in turn and return the results document."""
+    await app.router.startup()
+    ctx = Context.load()
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     timeout=None) as client:
+            for scenario in scenarios:
+                result = await run_scenario(
+                    client, ctx, scenario, requests, concurrency, warmup)
+                results[scenario.name] = result
+                print(format_result(scenario.name, result), flush=True)
+    finally:
+        await app.router.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": get_engine().dialect.name,
+            "python": platform.python_version(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "dataset": {
+                "users": len(ctx.user_ids),
+                "events": len(ctx.events),
+            },
+        },
+        "results": results,
+    }
+
+
+def format_result(name: str, result: Dict) -> str:
+    return (f"{name:<24} {result['throughput_rps']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+            f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}")
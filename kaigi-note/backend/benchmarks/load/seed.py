@@ -0,0 +1,153 @@
+"""Seed the load-benchmark dataset with bulk Core inserts.
+
+Each table is topped up to its target, so re-running is cheap and a
+partially seeded database is completed rather than duplicated. Seeded
+users all share one password (PASSWORD) and have ``load-<n>`` emails.
+Seeded participants are all confirmed, and ``events.participant_count``
+is backfilled from them as app.services.capacity expects.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select, update
+
+from app.core.database import Base, engine
+from app.core.security import get_password_hash
+from app.models import Event, EventParticipant, User
+from app.models.participant import CONFIRMED
+# Registers the keyword search index DDL with create_all
+import app.services.search  # noqa: F401
+
+USERS = 10_000
+EVENTS = 100_000
+PARTICIPANTS = 1_000_000
+
+PASSWORD = "benchmark-password"
+EMAIL_PREFIX = "load-"
+CHUNK_SIZE = 10_000
+
+TITLES = ["勉強会", "もくもく会", "LT大会", "Python Meetup", "読書会", "ハンズオン",
+          "Design Review", "交流会", "Fly.io Night", "FastAPI 入門"]
+PLACES = ["東京 会議室", "大阪 本町", "オンライン", "名古屋", "福岡 天神", "札幌"]
+STATUSES = ["planned"] * 6 + ["done"] * 3 + ["cancelled"]
+ATTENDANCE = ["pending", "attended", "absent"]
+
+
+def _insert_chunks(connection, table, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK_SIZE:
+            connection.execute(insert(table), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+
+
+def _participant_counts(rng: random.Random, events: int, total: int, users: int) -> List[int]:
+    """Split ``total`` participants over events with a long tail of large events."""
+    weights = [rng.paretovariate(1.5) for _ in range(events)]
+    scale = total / sum(weights)
+    counts = [min(users, int(w * scale)) for w in weights]
+    # Hand out what rounding and the per-event cap left over
+    missing = total - sum(counts)
+    for i in range(events):
+        if missing <= 0:
+            break
+        extra = min(users - counts[i], missing)
+        counts[i] += extra
+        missing -= extra
+    return counts
+
+
+def seed(users: int = USERS, events: int = EVENTS, participants: int = PARTICIPANTS,
+         random_seed: int = 42) -> Dict[str, int]:
+    """Top the tables up to the given sizes and return the resulting row counts."""
+    rng = random.Random(random_seed)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        existing = connection.execute(
+            select(func.count(User.id)).where(User.email.like(f"{EMAIL_PREFIX}%"))
+        ).scalar_one()
+        if existing < users:
+            started = time.perf_counter()
+            password_hash = get_password_hash(PASSWORD)
+            _insert_chunks(connection, User.__table__, (
+                {"name": f"ユーザー {i}", "email": f"{EMAIL_PREFIX}{i}@example.com",
+                 "password_hash": password_hash, "is_active": True}
+                for i in range(existing, users)
+            ))
+            print(f"users: +{users - existing} in {time.perf_counter() - started:.1f}s")
+
+        existing = connection.execute(select(func.count(Event.id))).scalar_one()
+        if existing < events:
+            started = time.perf_counter()
+            origin = datetime(2022, 1, 1, 9)
+
+            def event_rows():
+                for i in range(existing, events):
+                    start = origin + timedelta(minutes=rng.randrange(0, 5 * 365 * 24 * 60, 30))
+                    title = rng.choice(TITLES)
+                    yield {
+                        "title": f"{title} #{i}",
+                        "start_time": start,
+                        "end_time": start + timedelta(hours=rng.choice((1, 2, 3))),
+                        "place": rng.choice(PLACES),
+                        "content": f"{title}のお知らせ。" * rng.randint(1, 8),
+                        "status": rng.choice(STATUSES),
+                        "total_cost": rng.choice((0, 0, 5000, 20000, 100000)),
+                        "is_public": True,
+                    }
+            _insert_chunks(connection, Event.__table__, event_rows())
+            print(f"events: +{events - existing} in {time.perf_counter() - started:.1f}s")
+
+        existing = connection.execute(select(func.count(EventParticipant.id))).scalar_one()
+        if existing < participants:
+            started = time.perf_counter()
+            user_ids = connection.execute(
+                select(User.id).where(User.email.like(f"{EMAIL_PREFIX}%"))).scalars().all()
+            enrolled = set(connection.execute(
+                select(EventParticipant.event_id).distinct()).scalars())
+            event_ids = [
+                event_id for event_id in connection.execute(
+                    select(Event.id).order_by(Event.id)).scalars()
+                if event_id not in enrolled
+            ]
+            counts = _participant_counts(
+                rng, len(event_ids), participants - existing, len(user_ids))
+
+            def participant_rows():
+                for event_id, count in zip(event_ids, counts):
+                    for user_id in rng.sample(user_ids, count):
+                        yield {
+                            "event_id": event_id,
+                            "user_id": user_id,
+                            "paid_amount": rng.choice((0, 500, 1000)),
+                            "attendance_status": rng.choice(ATTENDANCE),
+                        }
+            if event_ids and user_ids:
+                _insert_chunks(connection, EventParticipant.__table__, participant_rows())
+                print(f"participants: +{sum(counts)} in {time.perf_counter() - started:.1f}s")
+
+        # The same backfill as the capacity migration; also repairs
+        # databases seeded before the counts were maintained
+        started = time.perf_counter()
+        confirmed = select(func.count(EventParticipant.id)).where(
+            EventParticipant.event_id == Event.id,
+            EventParticipant.enrollment_status == CONFIRMED,
+        ).scalar_subquery()
+        fixed = connection.execute(
+            update(Event).where(Event.participant_count != confirmed)
+            .values(participant_count=confirmed)
+        ).rowcount
+        if fixed:
+            print(f"participant counts: {fixed} events in {time.perf_counter() - started:.1f}s")
+
+        return {
+            "users": connection.execute(select(func.count(User.id))).scalar_one(),
+            "events": connection.execute(select(func.count(Event.id))).scalar_one(),
+            "participants": connection.execute(
+                select(func.count(EventParticipant.id))).scalar_one(),
+        }
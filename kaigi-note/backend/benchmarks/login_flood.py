@@ -0,0 +1,160 @@
+"""Event-listing latency during a credential-stuffing login flood.
+
+A probe client polls ``GET /api/events/?limit=20`` while wrong-password
+logins arrive at ``--rate`` per second for ``--seconds`` from ``--ips``
+client addresses against ``--accounts`` real accounts. The probe runs
+three times: with no flood, under the flood with the auth rate limiter
+off, and with it on. Reports how many logins reached bcrypt (401s) and
+exits non-zero if, with the limiter on, probe p95 exceeds
+``--max-slowdown`` times the quiet p95.
+
+    python -m benchmarks.login_flood --rate 100 --seconds 10 --ips 8 --accounts 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core import ratelimit
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import create_access_token, get_password_hash
+from app.main import app
+from app.models import Event, User
+
+PASSWORD = "flood-password"
+
+
+def seed(accounts: int, events: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    password_hash = get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        existing = set(db.execute(
+            select(User.email).where(User.email.like("flood-%"))).scalars())
+        db.add_all(
+            User(name=f"flood {i}", email=f"flood-{i}@example.com",
+                 password_hash=password_hash)
+            for i in range(accounts) if f"flood-{i}@example.com" not in existing
+        )
+        start = datetime(2024, 1, 1)
+        count = db.execute(select(func.count(Event.id))).scalar_one()
+        db.add_all(
+            Event(title=f"Event {i}", start_time=start + timedelta(hours=i),
+                  end_time=start + timedelta(hours=i + 2), place="Tokyo", content="勉強会")
+            for i in range(count, events)
+        )
+        db.commit()
+        return db.execute(
+            select(User.id).where(User.email == "flood-0@example.com")).scalar_one()
+
+
+def summarize(latencies) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+    return (f"p50 {statistics.median(ordered) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  "
+            f"max {ordered[-1] * 1000:7.2f} ms  ({len(ordered)} samples)")
+
+
+def p95(latencies) -> float:
+    ordered = sorted(latencies)
+    return ordered[max(0, int(len(ordered) * 0.95) - 1)]
+
+
+async def probe_while(client: httpx.AsyncClient, headers: dict, done: asyncio.Event,
+                      duration: float = None) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration if duration else None
+    while not done.is_set() and (deadline is None or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        response = await client.get("/api/events/", params={"limit": 20}, headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def flood(rate: float, seconds: float, ips: int, accounts: int,
+                concurrency: int) -> Counter:
+    """Paced login attempts; each attacker waits ``concurrency / rate`` between tries."""
+    statuses = Counter()
+    attempts = iter(range(int(rate * seconds)))
+    interval = concurrency / rate
+    clients = [
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, client=(f"203.0.113.{i + 1}", 40000)),
+            base_url="http://bench")
+        for i in range(ips)
+    ]
+
+    async def attacker(n: int):
+        client = clients[n % ips]
+        await asyncio.sleep(interval * n / concurrency)
+        for i in attempts:
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", data={
+                "username": f"flood-{i % accounts}@example.com", "password": "wrong-password"})
+            statuses[response.status_code] += 1
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    await asyncio.gather(*(attacker(n) for n in range(concurrency)))
+    for client in clients:
+        await client.aclose()
+    return statuses
+
+
+async def run(args) -> bool:
+    user_id = seed(args.accounts, 1000)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    transport = httpx.ASGITransport(app=app, client=("198.51.100.1", 40000))
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await probe_while(client, headers, asyncio.Event(), duration=0.5)  # warm up
+        quiet = await probe_while(client, headers, asyncio.Event(), duration=args.quiet_seconds)
+        print(f"quiet                 probe {summarize(quiet)}")
+        results["quiet"] = quiet
+
+        for label, enabled in (("flood, limiter off", False), ("flood, limiter on", True)):
+            settings.RATE_LIMIT_ENABLED = enabled
+            for limiter in (ratelimit.login_ip_limiter, ratelimit.login_account_limiter):
+                limiter.clear()
+            done = asyncio.Event()
+            probe_task = asyncio.create_task(probe_while(client, headers, done))
+            started = time.perf_counter()
+            statuses = await flood(
+                args.rate, args.seconds, args.ips, args.accounts, args.concurrency)
+            elapsed = time.perf_counter() - started
+            done.set()
+            latencies = await probe_task
+            results[label] = latencies
+            print(f"{label:<21} probe {summarize(latencies)}")
+            print(f"{'':<21} logins {dict(statuses)} in {elapsed:.2f}s")
+
+    limit = p95(results["quiet"]) * args.max_slowdown
+    ok = p95(results["flood, limiter on"]) <= limit
+    print(f"{'OK' if ok else 'FAIL'}: limiter-on p95 "
+          f"{p95(results['flood, limiter on']) * 1000:.2f} ms vs limit {limit * 1000:.2f} ms")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100.0, help="login attempts per second")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--ips", type=int, default=8)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--quiet-seconds", type=float, default=3.0)
+    parser.add_argument("--max-slowdown", type=float, default=3.0)
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
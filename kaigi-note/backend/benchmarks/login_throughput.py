@@ -0,0 +1,90 @@
+"""Login throughput under a burst, and its effect on other endpoints.
+
+Fires ``--requests`` logins at ``--concurrency`` while a single probe
+client keeps calling ``GET /``. Reports login throughput, how many
+logins were shed with 503, and the probe latency seen meanwhile.
+
+    RATE_LIMIT_ENABLED=false BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=2 python -m benchmarks.login_throughput
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import select
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import get_password_hash
+from app.main import app
+from app.models import User
+
+PASSWORD = "benchmark-password"
+
+
+def seed(users: int) -> None:
+    password_hash = get_password_hash(PASSWORD)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        existing = set(db.execute(
+            select(User.email).where(User.email.like("login-bench-%"))).scalars())
+        db.add_all(
+            User(name=f"bench {i}", email=f"login-bench-{i}@example.com",
+                 password_hash=password_hash)
+            for i in range(users)
+            if f"login-bench-{i}@example.com" not in existing
+        )
+        db.commit()
+
+
+async def run(users: int, concurrency: int, requests: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    statuses = Counter()
+    probe_latencies = []
+    remaining = iter(range(requests))
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login_worker():
+            for i in remaining:
+                response = await client.post("/api/auth/login", data={
+                    "username": f"login-bench-{i % users}@example.com",
+                    "password": PASSWORD,
+                })
+                statuses[response.status_code] += 1
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    probe_latencies.sort()
+    print(f"logins     {statuses[200] / elapsed:8.1f} ok/s over {elapsed:.2f}s  "
+          f"statuses {dict(statuses)}")
+    print(f"GET / probe  p50 {statistics.median(probe_latencies) * 1000:7.2f} ms  "
+          f"max {probe_latencies[-1] * 1000:7.2f} ms  ({len(probe_latencies)} samples)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.users)
+    asyncio.run(run(args.users, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
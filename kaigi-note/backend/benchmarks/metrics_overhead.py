@@ -0,0 +1,82 @@
+"""Per-request cost of the metrics middleware and SQL cursor hooks.
+
+Serves ``GET /api/events/{id}`` (three SQL statements) and ``GET /``
+(none) from two apps built in the same process, one with
+METRICS_ENABLED and one without, alternating rounds to cancel drift.
+Reports the mean latency of each and the difference per request.
+
+    python -m benchmarks.metrics_overhead --rounds 10 --requests 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine, get_async_engine
+from app.core.metrics import instrument_engine, uninstrument_engine
+from app.core.security import create_access_token
+from app.main import create_app
+from app.models import Event, User
+
+
+def seed() -> tuple:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(name="metrics bench", email=f"metrics-{time.time_ns()}@example.com",
+                    password_hash="x")
+        start = datetime(2025, 1, 1, 10)
+        event = Event(title="Metrics", start_time=start,
+                      end_time=start + timedelta(hours=2), place="東京", content="勉強会")
+        db.add_all([user, event])
+        db.commit()
+        return user.id, event.id
+
+
+async def timed(app, path: str, headers: dict, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+        return (time.perf_counter() - started) / requests
+
+
+async def run(rounds: int, requests: int) -> None:
+    user_id, event_id = seed()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    # Create the engine (and its hooks) before switching the setting off
+    sync_engine = get_async_engine().sync_engine
+    with_metrics = create_app()
+    settings.METRICS_ENABLED = False
+    without_metrics = create_app()
+
+    for path in ("/", f"/api/events/{event_id}"):
+        samples = {"on": [], "off": []}
+        await timed(with_metrics, path, headers, requests)  # warm up caches
+        for _ in range(rounds):
+            samples["on"].append(await timed(with_metrics, path, headers, requests))
+            uninstrument_engine(sync_engine)
+            samples["off"].append(await timed(without_metrics, path, headers, requests))
+            instrument_engine(sync_engine)
+        on = statistics.median(samples["on"]) * 1e6
+        off = statistics.median(samples["off"]) * 1e6
+        print(f"{path:<20} metrics off {off:8.1f} us   on {on:8.1f} us   "
+              f"overhead {on - off:+6.1f} us ({(on - off) / off:+.1%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rounds, args.requests))
+
+
+if __name__ == "__main__":
+    main()
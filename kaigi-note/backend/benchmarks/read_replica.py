@@ -0,0 +1,156 @@
+"""Read replica routing against two local SQLite databases.
+
+The primary and the "replica" are separate files; replication is a manual
+copy with the sqlite3 backup API, so the replica is exactly as stale as
+the script wants. Checks that reads go to the replica, that a user's own
+writes are visible to them straight away (in this worker, and on another
+worker through the echoed header) while other users still see the
+replica, that reads fall back to the primary when the replica lags or is
+unreachable and return once it recovers, and prints the replica metrics.
+Exits non-zero on any mismatch.
+
+    python -m benchmarks.read_replica
+"""
+import asyncio
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="kaigi-replica-")
+PRIMARY = os.path.join(WORKDIR, "primary.db")
+REPLICA_DIR = os.path.join(WORKDIR, "replica")
+REPLICA = os.path.join(REPLICA_DIR, "replica.db")
+MAX_LAG = 0.5
+
+# Settings are read at import time
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{PRIMARY}",
+    "DATABASE_READ_URL": f"sqlite:///{REPLICA}",
+    "REPLICA_MAX_LAG_SECONDS": str(MAX_LAG),
+    # Checks are driven by hand below
+    "REPLICA_CHECK_INTERVAL": "3600",
+    "RATE_LIMIT_ENABLED": "false",
+})
+
+import httpx  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine, get_read_engine  # noqa: E402
+from app.core.replica import CONSISTENT_READ_HEADER, replica_monitor  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+def replicate() -> None:
+    """Copy the primary over the replica."""
+    os.makedirs(REPLICA_DIR, exist_ok=True)
+    source, target = sqlite3.connect(PRIMARY), sqlite3.connect(REPLICA)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        users = [User(name=name, email=f"{name}@example.com", password_hash="x")
+                 for name in ("writer", "reader")]
+        db.add_all(users)
+        db.commit()
+        return [{"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+                for user in users]
+
+
+def check(label: str, actual, expected) -> bool:
+    ok = actual == expected
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {actual}" + ("" if ok else f" (expected {expected})"))
+    return ok
+
+
+async def run() -> bool:
+    ok = True
+    writer, reader = seed()
+    replicate()
+    await app.router.startup()
+    # The startup check found no heartbeat on the replica yet
+    ok &= check("status before the first heartbeat is replicated",
+                replica_monitor.status, "lagging")
+    replicate()
+    await replica_monitor.check()
+    ok &= check("status once replicated", replica_monitor.status, "ok")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def status_of(path: str, headers: dict) -> int:
+            return (await client.get(path, headers=headers)).status_code
+
+        await client.get("/api/events/", headers=reader)
+        ok &= check("listing served by", replica_monitor.reads, {"replica": 1})
+
+        response = await client.post("/api/events/", headers=writer, json={
+            "start_time": "2027-04-01T10:00:00", "end_time": "2027-04-01T12:00:00",
+            "place": "Tokyo", "content": "replica check"})
+        path = f"/api/events/{response.json()['id']}"
+        until = response.headers.get(CONSISTENT_READ_HEADER)
+        ok &= check("write response carries the consistent-read header", until is not None, True)
+
+        # Read-your-writes: the writer sees the new event, the reader
+        # still reads the replica, which does not have it yet
+        ok &= check("writer reads own write", await status_of(path, writer), 200)
+        ok &= check("reader on the stale replica", await status_of(path, reader), 404)
+
+        # On another worker only the echoed header knows about the write
+        replica_monitor._recent_writers.clear()
+        ok &= check("writer on another worker, header echoed",
+                    await status_of(path, {**writer, CONSISTENT_READ_HEADER: until}), 200)
+        ok &= check("writer on another worker, no header", await status_of(path, writer), 404)
+
+        # Past the lag limit every read goes to the primary
+        await asyncio.sleep(MAX_LAG + 0.1)
+        await replica_monitor.check()
+        ok &= check("status after missing replication", replica_monitor.status, "lagging")
+        ok &= check("reader while lagging", await status_of(path, reader), 200)
+
+        replicate()
+        await replica_monitor.check()
+        ok &= check("status after replication", replica_monitor.status, "ok")
+        before = replica_monitor.reads.get("replica", 0)
+        ok &= check("reader after recovery", await status_of(path, reader), 200)
+        ok &= check("served by the replica", replica_monitor.reads.get("replica", 0), before + 1)
+
+        # An unreachable replica falls back to the primary
+        shutil.move(REPLICA_DIR, REPLICA_DIR + ".gone")
+        await get_read_engine().dispose()
+        started = time.perf_counter()
+        ok &= check("reader with the replica gone", await status_of(path, reader), 200)
+        print(f"     fallback read took {(time.perf_counter() - started) * 1000:.1f} ms")
+        ok &= check("status after a failed connect", replica_monitor.status, "down")
+        await replica_monitor.check()
+        ok &= check("failed checks", replica_monitor.check_failures, 1)
+
+        shutil.move(REPLICA_DIR + ".gone", REPLICA_DIR)
+        replicate()
+        await replica_monitor.check()
+        ok &= check("status once the replica is back", replica_monitor.status, "ok")
+
+        print()
+        print((await client.get("/api/health/replica")).json())
+        metrics = (await client.get("/metrics")).text
+        print("".join(line + "\n" for line in metrics.splitlines()
+                      if "kaigi_db_re" in line))
+    await app.router.shutdown()
+    shutil.rmtree(WORKDIR)
+    return ok
+
+
+def main() -> None:
+    if not asyncio.run(run()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
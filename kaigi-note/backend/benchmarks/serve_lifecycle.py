@@ -0,0 +1,169 @@
+"""Worker recycling and SIGTERM draining of ``python -m app.serve``.
+
+Starts the production launcher against a temporary SQLite database that
+is already at the Alembic head (so the startup migration and the "check"
+startup mode both run, as in the Docker image), then:
+
+- sends ``--requests`` requests and counts how many workers were replaced
+  after ``--max-requests`` each, and how many requests failed meanwhile;
+- starts ``--logins`` concurrent logins (slow: bcrypt), sends SIGTERM to
+  the master while they are in flight, and checks that every one still
+  completes, that the shutdown hooks ran and that the server exited.
+
+Exits non-zero on any failure.
+
+    python -m benchmarks.serve_lifecycle --requests 300 --max-requests 50
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+PASSWORD = "lifecycle-password"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare_database(url: str) -> None:
+    """Create the schema and stamp it at head, in a separate interpreter
+    so that this process never imports the app with the wrong settings."""
+    subprocess.run([sys.executable, "-c", (
+        "from alembic import command\n"
+        "from app.core.database import Base, engine\n"
+        "from app.core.migrations import alembic_config\n"
+        "import app.models\n"
+        "Base.metadata.create_all(bind=engine)\n"
+        "command.stamp(alembic_config(), 'head')\n"
+    )], env={**os.environ, "DATABASE_URL": url}, check=True, capture_output=True)
+
+
+def wait_until_up(base_url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            httpx.get(base_url + "/").raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+def check(label: str, ok: bool, detail) -> bool:
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {detail}")
+    return ok
+
+
+def run(args) -> bool:
+    ok = True
+    workdir = tempfile.mkdtemp(prefix="kaigi-serve-")
+    url = f"sqlite:///{os.path.join(workdir, 'serve.db')}"
+    log_path = os.path.join(workdir, "server.log")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    prepare_database(url)
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "DB_STARTUP_MODE": "check",
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(args.workers),
+        "WEB_MAX_REQUESTS": str(args.max_requests),
+        "WEB_MAX_REQUESTS_JITTER": str(args.max_requests // 5),
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    with open(log_path, "w") as log:
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "-m", "app.serve"],
+                                  env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_until_up(base_url, server)
+            print(f"up in {time.perf_counter() - started:.2f}s with {args.workers} workers")
+
+            failures = 0
+            with httpx.Client(base_url=base_url) as client:
+                for _ in range(args.requests):
+                    try:
+                        client.get("/").raise_for_status()
+                    except httpx.HTTPError:
+                        failures += 1
+            # Roughly one replacement per max + jitter requests; uvicorn only
+            # checks the limit every 0.1s, so a worker can overshoot it
+            expected = args.requests // (args.max_requests + args.max_requests // 10)
+            # A replacement boots a moment after its predecessor exits
+            deadline = time.monotonic() + 5
+            while True:
+                with open(log_path) as f:
+                    boots = f.read().count("Booting worker")
+                recycled = boots - args.workers
+                if recycled >= expected or time.monotonic() > deadline:
+                    break
+                time.sleep(0.2)
+            ok &= check("workers recycled", recycled > 0, f"{recycled} (about {expected} expected)")
+            ok &= check("requests failed while recycling", failures <= recycled,
+                        f"{failures} of {args.requests}")
+
+            # Slow requests in flight when SIGTERM arrives must still finish
+            httpx.post(base_url + "/api/auth/register", json={
+                "name": "drain", "email": "drain@example.com", "password": PASSWORD,
+            }).raise_for_status()
+
+            def login(_):
+                try:
+                    return httpx.post(base_url + "/api/auth/login", timeout=60, data={
+                        "username": "drain@example.com", "password": PASSWORD,
+                    }).status_code
+                except httpx.HTTPError as exc:
+                    return type(exc).__name__
+
+            with ThreadPoolExecutor(args.logins) as pool:
+                pending = pool.map(login, range(args.logins))
+                # Long enough for the workers to have accepted every
+                # connection; ones still in the listen backlog are refused
+                time.sleep(0.3)
+                server.send_signal(signal.SIGTERM)
+                signalled = time.perf_counter()
+                statuses = list(pending)
+            ok &= check("logins in flight at SIGTERM", statuses == [200] * args.logins, statuses)
+            server.wait(timeout=60)
+            ok &= check("server exited after draining", server.returncode == 0,
+                        f"code {server.returncode} "
+                        f"{time.perf_counter() - signalled:.2f}s after SIGTERM")
+        finally:
+            if server.poll() is None:
+                server.kill()
+
+    with open(log_path) as f:
+        shutdowns = f.read().count("Application shutdown complete")
+    ok &= check("shutdown hooks ran", shutdowns >= boots, f"{shutdowns} of {boots} workers")
+    if not ok:
+        print(f"server log: {log_path}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--max-requests", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=4)
+    args = parser.parse_args()
+    if not run(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Cold-start time of the API, checked against a budget.
+
+Starts ``--runs`` fresh interpreters, each of which imports ``app.main``,
+runs the startup hooks and serves ``GET /`` in-process. Reports the median
+and worst time for each phase plus the whole process, and exits non-zero
+if the median time to first response exceeds ``--budget-ms``. Settings are
+read from the environment as usual, so the startup mode can be compared:
+
+    DB_STARTUP_MODE=check python -m benchmarks.startup --runs 10 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    import httpx
+    await app.router.startup()
+    started = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/")
+    response.raise_for_status()
+    await app.router.shutdown()
+    return started
+
+started = asyncio.run(first_request())
+served = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "startup": started - imported,
+    "first_request": served - started,
+    "ready": served - start,
+}))
+"""
+
+PHASES = ("import", "startup", "first_request", "ready", "process")
+
+
+def cold_start() -> dict:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = elapsed
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2000.0,
+                        help="fail if the median time to first response exceeds this")
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.runs)]
+    print(f"{args.runs} cold starts, DB_STARTUP_MODE="
+          f"{os.getenv('DB_STARTUP_MODE', 'create')}")
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        print(f"  {phase:<14} median {statistics.median(values):7.1f} ms"
+              f"   max {max(values):7.1f} ms")
+
+    ready = statistics.median(run["ready"] for run in runs) * 1000
+    if ready > args.budget_ms:
+        print(f"FAIL: median time to first response {ready:.1f} ms "
+              f"exceeds budget {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"OK: within {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
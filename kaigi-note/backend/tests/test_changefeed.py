@@ -0,0 +1,74 @@
+"""Change feed history overflow and subscriber limits."""
+import asyncio
+
+import pytest
+
+from app.services.changefeed import RESET_FRAME, ChangeFeed, change_feed
+
+pytestmark = pytest.mark.anyio
+
+
+def change(event_id: int) -> dict:
+    return {"kind": "event.updated", "event_id": event_id}
+
+
+async def waiting_stream(feed: ChangeFeed, event_id=None):
+    """A subscriber that has sent its first frame and is waiting for changes."""
+    stream = feed.subscribe(event_id)
+    assert (await stream.__anext__()).startswith(b"retry:")
+    next_frame = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+    return stream, next_frame
+
+
+async def test_other_events_overflowing_history_do_not_reset_scoped(app):
+    feed = ChangeFeed(history=4, keepalive=60)
+    stream, next_frame = await waiting_stream(feed, event_id=1)
+
+    for _ in range(10):
+        feed.deliver(change(2))
+    feed.deliver(change(1))
+
+    frame = await next_frame
+    assert frame != RESET_FRAME
+    assert b'"event_id":1' in frame
+    await stream.aclose()
+
+
+async def test_scoped_subscriber_reset_when_its_change_was_dropped(app):
+    feed = ChangeFeed(history=4, keepalive=60)
+    stream, next_frame = await waiting_stream(feed, event_id=1)
+
+    feed.deliver(change(1))
+    for _ in range(4):
+        feed.deliver(change(2))
+
+    assert await next_frame == RESET_FRAME
+    await stream.aclose()
+
+
+async def test_unscoped_subscriber_reset_on_overflow(app):
+    feed = ChangeFeed(history=4, keepalive=60)
+    stream, next_frame = await waiting_stream(feed)
+
+    for event_id in range(5):
+        feed.deliver(change(event_id))
+
+    assert await next_frame == RESET_FRAME
+    await stream.aclose()
+
+
+def test_reserve_counts_slots_up_front():
+    feed = ChangeFeed(max_subscribers=2)
+    assert feed.reserve() and feed.reserve()
+    assert not feed.reserve()
+    assert feed.subscribers == 2
+    feed.release()
+    assert feed.reserve()
+
+
+async def test_stream_refused_when_slots_taken(client, headers, monkeypatch):
+    monkeypatch.setattr(change_feed, "max_subscribers", change_feed.subscribers)
+    response = await client.get("/api/events/stream", headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
@@ -0,0 +1,95 @@
+"""Date-range filtering of the event listing and the calendar counts.
+
+Each test uses its own year, so events created by other tests never fall
+inside its windows.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_event(client, headers, start: str, end: str) -> int:
+    response = await client.post("/api/events/", headers=headers, json={
+        "title": "range", "start_time": start, "end_time": end, "place": "Tokyo"})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def listed(client, headers, **window) -> set:
+    params = {"limit": 1000}
+    params.update({"from" if name == "from_" else name: value for name, value in window.items()})
+    response = await client.get("/api/events/", headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return {event["id"] for event in response.json()}
+
+
+async def calendar(client, headers, year: int, month: int, utc_offset: int = 0) -> dict:
+    response = await client.get("/api/events/calendar", headers=headers, params={
+        "year": year, "month": month, "utc_offset": utc_offset})
+    assert response.status_code == 200, response.text
+    return {day["date"]: day["count"] for day in response.json()}
+
+
+async def test_window_excludes_events_touching_its_edges(client, headers):
+    morning = await create_event(client, headers, "2040-03-01T10:00Z", "2040-03-01T12:00Z")
+    noon = await create_event(client, headers, "2040-03-01T12:00Z", "2040-03-01T14:00Z")
+
+    # Ends exactly at "from": no overlap
+    assert await listed(client, headers, from_="2040-03-01T12:00Z",
+                        to="2040-03-02T00:00Z") == {noon}
+    # Starts exactly at "to": no overlap
+    assert await listed(client, headers, from_="2040-03-01T00:00Z",
+                        to="2040-03-01T12:00Z") == {morning}
+    assert await listed(client, headers, from_="2040-03-01T11:00Z",
+                        to="2040-03-01T13:00Z") == {morning, noon}
+
+
+async def test_window_open_on_either_side(client, headers):
+    early = await create_event(client, headers, "2040-04-01T10:00Z", "2040-04-01T11:00Z")
+    late = await create_event(client, headers, "2040-04-20T10:00Z", "2040-04-20T11:00Z")
+
+    after = await listed(client, headers, from_="2040-04-10T00:00Z")
+    assert late in after and early not in after
+    before = await listed(client, headers, to="2040-04-10T00:00Z")
+    assert early in before and late not in before
+
+
+async def test_window_offsets_are_honoured(client, headers):
+    # May 2 in JST
+    event_id = await create_event(client, headers, "2040-05-01T20:00Z", "2040-05-01T21:00Z")
+
+    assert await listed(client, headers, from_="2040-05-02T00:00+09:00",
+                        to="2040-05-03T00:00+09:00") == {event_id}
+    assert await listed(client, headers, from_="2040-05-01T00:00+09:00",
+                        to="2040-05-02T00:00+09:00") == set()
+
+
+async def test_empty_window_rejected(client, headers):
+    for to in ("2040-06-01T00:00Z", "2040-05-31T00:00Z"):
+        response = await client.get("/api/events/", headers=headers, params={
+            "from": "2040-06-01T00:00Z", "to": to})
+        assert response.status_code == 400
+
+
+async def test_calendar_counts_every_day_an_event_covers(client, headers):
+    await create_event(client, headers, "2041-06-10T22:00Z", "2041-06-12T02:00Z")
+    await create_event(client, headers, "2041-06-11T09:00Z", "2041-06-11T10:00Z")
+
+    counts = await calendar(client, headers, 2041, 6)
+    assert len(counts) == 30
+    assert counts["2041-06-10"] == 1
+    assert counts["2041-06-11"] == 2
+    assert counts["2041-06-12"] == 1
+    assert all(count == 0 for day, count in counts.items()
+               if day not in ("2041-06-10", "2041-06-11", "2041-06-12"))
+
+
+async def test_calendar_days_follow_utc_offset(client, headers):
+    await create_event(client, headers, "2042-05-01T20:00Z", "2042-05-01T21:00Z")
+
+    utc = await calendar(client, headers, 2042, 5)
+    assert utc["2042-05-01"] == 1 and utc["2042-05-02"] == 0
+    jst = await calendar(client, headers, 2042, 5, utc_offset=540)
+    assert jst["2042-05-01"] == 0 and jst["2042-05-02"] == 1
+    # Behind UTC the same instant is still May 1
+    assert (await calendar(client, headers, 2042, 5, utc_offset=-300))["2042-05-01"] == 1
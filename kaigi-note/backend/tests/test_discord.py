@@ -0,0 +1,144 @@
+"""Outbox delivery to the Discord webhook, against an httpx MockTransport."""
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import delete, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.notification import NotificationOutbox
+from app.services.discord import MAX_EMBEDS_PER_MESSAGE, OutboxDispatcher
+
+pytestmark = pytest.mark.anyio
+
+WEBHOOK_URL = "https://discord.test/api/webhooks/1/token"
+
+
+def utc(value: datetime) -> datetime:
+    # SQLite returns naive UTC datetimes, PostgreSQL aware ones
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+async def queue(*titles: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(NotificationOutbox))
+        db.add_all(NotificationOutbox(payload={"title": title}) for title in titles)
+        await db.commit()
+
+
+async def outbox() -> dict:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(NotificationOutbox))).scalars().all()
+        return {row.payload["title"]: row for row in rows}
+
+
+def dispatcher(handler, **kwargs) -> OutboxDispatcher:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return OutboxDispatcher(WEBHOOK_URL, client=client, **kwargs)
+
+
+def embeds(request: httpx.Request) -> list:
+    return [embed["title"] for embed in json.loads(request.content)["embeds"]]
+
+
+async def test_sends_batches_of_ten(app):
+    titles = [f"n{i}" for i in range(MAX_EMBEDS_PER_MESSAGE + 2)]
+    await queue(*titles)
+    messages = []
+
+    def handler(request):
+        messages.append(embeds(request))
+        return httpx.Response(204)
+
+    sender = dispatcher(handler)
+    assert await sender.dispatch_once() == MAX_EMBEDS_PER_MESSAGE
+    assert await sender.dispatch_once() == 2
+    assert await sender.dispatch_once() == 0
+
+    assert messages == [titles[:MAX_EMBEDS_PER_MESSAGE], titles[MAX_EMBEDS_PER_MESSAGE:]]
+    rows = await outbox()
+    assert all(row.sent_at is not None and row.claimed_until is None for row in rows.values())
+
+
+async def test_rate_limit_waits_out_retry_after(app):
+    await queue("a", "b")
+    sender = dispatcher(lambda request: httpx.Response(429, headers={"Retry-After": "30"}))
+
+    assert await sender.dispatch_once() == 0
+    assert sender._rate_limited_for == 30.0
+    for row in (await outbox()).values():
+        assert row.sent_at is None and row.claimed_until is None
+        # Not counted as an attempt
+        assert row.attempts == 0
+        assert utc(row.next_attempt_at) > datetime.now(timezone.utc) + timedelta(seconds=25)
+    # Not due again until Retry-After has passed
+    assert await sender.dispatch_once() == 0
+
+
+async def test_rejected_row_is_dead_lettered_alone(app):
+    await queue("good 1", "bad", "good 2")
+    messages = []
+
+    def handler(request):
+        messages.append(embeds(request))
+        if "bad" in messages[-1]:
+            return httpx.Response(400, json={"embeds": ["invalid"]})
+        return httpx.Response(204)
+
+    sender = dispatcher(handler, max_attempts=5)
+    assert await sender.dispatch_once() == 2
+
+    assert messages == [["good 1", "bad", "good 2"], ["good 1"], ["bad"], ["good 2"]]
+    rows = await outbox()
+    assert rows["good 1"].sent_at is not None and rows["good 2"].sent_at is not None
+    assert rows["bad"].sent_at is None
+    assert rows["bad"].attempts == 5
+    assert rows["bad"].last_error.startswith("HTTP 400")
+    assert await sender.dispatch_once() == 0
+
+
+async def test_failure_retries_with_backoff(app):
+    await queue("a")
+
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    sender = dispatcher(handler)
+    assert await sender.dispatch_once() == 0
+
+    row = (await outbox())["a"]
+    assert row.sent_at is None and row.claimed_until is None
+    assert row.attempts == 1
+    assert row.last_error.startswith("ConnectError")
+    assert utc(row.next_attempt_at) > datetime.now(timezone.utc)
+
+
+async def test_posts_after_the_claim_commits(app):
+    await queue("a")
+    claimed_elsewhere = []
+
+    async def handler(request):
+        # Another dispatcher can write (SQLite would be locked if the claim
+        # transaction were still open) and does not get the claimed row
+        claimed_elsewhere.extend(await dispatcher(handler)._claim())
+        return httpx.Response(204)
+
+    assert await dispatcher(handler).dispatch_once() == 1
+    assert claimed_elsewhere == []
+
+
+async def test_prune_deletes_old_sent_rows(app):
+    await queue("old", "recent", "pending")
+    async with AsyncSessionLocal() as db:
+        rows = {row.payload["title"]: row
+                for row in (await db.execute(select(NotificationOutbox))).scalars()}
+        now = datetime.now(timezone.utc)
+        rows["old"].sent_at = now - timedelta(days=8)
+        rows["recent"].sent_at = now - timedelta(days=1)
+        await db.commit()
+
+    sender = dispatcher(lambda request: httpx.Response(204),
+                        sent_retention=timedelta(days=7).total_seconds())
+    assert await sender.prune() == 1
+    assert set(await outbox()) == {"recent", "pending"}
@@ -0,0 +1,98 @@
+"""Conditional GETs must never answer 304 for a changed response.
+
+Every write here lands within the same second as the revalidation that
+follows it, which timestamps alone cannot tell apart on SQLite.
+"""
+import itertools
+
+import pytest
+
+from .conftest import auth_headers, create_user
+
+pytestmark = pytest.mark.anyio
+
+_days = itertools.count(1)
+
+
+async def create_event(client, headers, **fields) -> dict:
+    # A day of its own, so the listing window below holds only this event
+    day = f"2030-01-{next(_days):02d}"
+    response = await client.post("/api/events/", headers=headers, json={
+        "start_time": f"{day}T10:00:00", "end_time": f"{day}T12:00:00",
+        "place": "Tokyo", "content": "etag", **fields})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def revalidate(client, path: str, headers: dict, etag: str, **params):
+    return await client.get(path, params=params, headers={**headers, "If-None-Match": etag})
+
+
+async def test_unchanged_listing_is_not_modified(client, headers):
+    event = await create_event(client, headers)
+    window = {"from": event["start_time"], "to": event["end_time"]}
+    response = await client.get("/api/events/", params=window, headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await revalidate(client, "/api/events/", headers, etag, **window)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+async def test_listing_changes_after_update(client, headers):
+    event = await create_event(client, headers)
+    window = {"from": event["start_time"], "to": event["end_time"]}
+    response = await client.get("/api/events/", params=window, headers=headers)
+    etag = response.headers["ETag"]
+
+    await client.put(f"/api/events/{event['id']}", headers=headers, json={"place": "Osaka"})
+
+    response = await revalidate(client, "/api/events/", headers, etag, **window)
+    assert response.status_code == 200
+    assert [row["place"] for row in response.json()] == ["Osaka"]
+
+
+async def test_detail_changes_after_participant_update(client, headers, user):
+    event = await create_event(client, headers)
+    path = f"/api/events/{event['id']}"
+    response = await client.post(f"{path}/participants", headers=headers,
+                                 json={"user_id": user.id, "paid_amount": 0})
+    participant_id = response.json()["id"]
+    etag = (await client.get(path, headers=headers)).headers["ETag"]
+    assert (await revalidate(client, path, headers, etag)).status_code == 304
+
+    await client.put(f"{path}/participants/{participant_id}", headers=headers,
+                     json={"paid_amount": 500})
+
+    response = await revalidate(client, path, headers, etag)
+    assert response.status_code == 200
+    assert response.json()["participants"][0]["paid_amount"] == 500
+
+
+async def test_participants_change_after_user_rename(client, headers, user):
+    event = await create_event(client, headers)
+    path = f"/api/events/{event['id']}/participants"
+    await client.post(path, headers=headers, json={"user_id": user.id})
+    etag = (await client.get(path, headers=headers)).headers["ETag"]
+
+    await client.put(f"/api/users/{user.id}", headers=headers, json={"name": "renamed"})
+
+    response = await revalidate(client, path, headers, etag)
+    assert response.status_code == 200
+    assert response.json()[0]["user_name"] == "renamed"
+
+
+async def test_participants_change_after_waitlist_promotion(client, headers, user):
+    # The promotion is a Core UPDATE, which must bump the row version too
+    event = await create_event(client, headers, max_participants=1)
+    path = f"/api/events/{event['id']}/participants"
+    first = (await client.post(path, headers=headers, json={"user_id": user.id})).json()
+    waitlisted = create_user("waitlisted")
+    await client.post(path, headers=headers, json={"user_id": waitlisted.id})
+    etag = (await client.get(path, headers=auth_headers(waitlisted))).headers["ETag"]
+
+    await client.delete(f"{path}/{first['id']}", headers=headers)
+
+    response = await revalidate(client, path, headers, etag)
+    assert response.status_code == 200
+    assert [row["enrollment_status"] for row in response.json()] == ["confirmed"]
@@ -0,0 +1,50 @@
+"""GET /api/events/{id} runs a fixed number of statements.
+
+However many participants the event has, the handler loads the event row
+and then every participant in a single IN query; with the user lookup of
+a cold cache that is at most three statements.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.models import Event, EventParticipant, User
+
+from .conftest import auth_headers, create_user
+
+pytestmark = pytest.mark.anyio
+
+MAX_QUERIES = 3
+
+
+def create_event(participants: int) -> int:
+    with SessionLocal() as db:
+        users = [User(name=f"detail {i}", email=f"detail-{participants}-{i}@example.com",
+                      password_hash="x")
+                 for i in range(participants)]
+        start = datetime(2031, 1, 1, 10)
+        db_event = Event(title="Large event", start_time=start,
+                         end_time=start + timedelta(hours=2), place="Tokyo")
+        db.add_all(users + [db_event])
+        db.flush()
+        db.add_all(EventParticipant(event_id=db_event.id, user_id=user.id, paid_amount=1000)
+                   for user in users)
+        db.commit()
+        return db_event.id
+
+
+@pytest.mark.parametrize("participants", [1, 1000])
+async def test_event_detail_query_count(sql, participants):
+    event_id = create_event(participants)
+    # A fresh user, so the authentication lookup is counted too
+    user = create_user("detail reader")
+    headers = auth_headers(user)
+
+    response = await sql.request("GET", "/api/events/{event_id}", headers=headers,
+                                 path_params={"event_id": event_id})
+
+    assert response.status_code == 200
+    assert len(response.json()["participants"]) == participants
+    statements = sql.for_route("GET /api/events/{event_id}")
+    assert len(statements) <= MAX_QUERIES, statements
@@ -0,0 +1,19 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+
+from app.core.database import Base, get_engine
+from app.core.migrations import include_name
+from app.services.search import SQLITE_TRIGRAM_AVAILABLE
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_autogenerate_keeps_raw_ddl_objects(app):
+    with get_engine().connect() as connection:
+        if connection.dialect.name == "sqlite" and SQLITE_TRIGRAM_AVAILABLE:
+            assert "events_fts" in inspect(connection).get_table_names()
+        context = MigrationContext.configure(
+            connection, opts={"include_name": include_name})
+        assert compare_metadata(context, Base.metadata) == []
@@ -0,0 +1,138 @@
+"""Every statement the routers run must be answered from an index.
+
+The statements are the ones the app actually sends during a tour of the
+API (tests/tour.py), with their real parameters. Each is EXPLAINed on
+the same engine; a full table scan of a non-trivial table fails the
+test. On PostgreSQL sequential scans are disabled while explaining, so a
+"Seq Scan" in the plan means no usable index exists rather than that the
+table is just small.
+
+The suite runs on SQLite unless TEST_DATABASE_URL names another database
+(see conftest); the PostgreSQL-only checks are skipped without one.
+"""
+import json
+import re
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.database import Base, get_async_engine
+
+from .tour import SKIPPED_ROUTES, api_routes, tour
+
+pytestmark = pytest.mark.anyio
+
+# Tables that hold a single row or a handful; scanning them is the plan
+TRIVIAL_TABLES = {"replica_heartbeat"}
+
+# Routes that read a whole table by design
+FULL_READ_ROUTES = {"GET /api/events/export"}
+
+# SQLite reports a full table scan as "SCAN <table>" (older versions
+# "SCAN TABLE <table>") with no index
+SQLITE_TABLE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+SQLITE_TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+POSTGRES = make_url(settings.DATABASE_URL).get_backend_name() in ("postgresql", "postgres")
+
+
+def _primary_key_walk(statement: str, table: str) -> bool:
+    """An unfiltered, LIMITed read of ``table`` in primary key order.
+
+    SQLite reports it as "SCAN <table>" too, although it reads the rowid
+    b-tree in order and stops at the limit (the first page of a keyset
+    listing).
+    """
+    statement = " ".join(statement.split())
+    return (" WHERE " not in statement and " JOIN " not in statement
+            and re.search(rf" FROM {table} ORDER BY {table}\.id LIMIT ", statement) is not None)
+
+
+async def sequential_scans(connection, statement: str, parameters) -> list:
+    """Non-trivial tables ``statement`` reads with a full scan."""
+    tables = set(Base.metadata.tables) - TRIVIAL_TABLES
+    if connection.dialect.name == "sqlite":
+        rows = (await connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters)).all()
+        details = [row[-1] for row in rows]
+        scans = []
+        for detail in details:
+            match = SQLITE_TABLE_SCAN.match(detail)
+            if match and match.group(1) in tables:
+                table = match.group(1)
+                if SQLITE_TEMP_SORT in details or not _primary_key_walk(statement, table):
+                    scans.append(table)
+        return scans
+
+    return [node["Relation Name"]
+            for node in await postgres_plan(connection, statement, parameters)
+            if node["Node Type"] == "Seq Scan" and node["Relation Name"] in tables]
+
+
+async def postgres_plan(connection, statement: str, parameters) -> list:
+    """Every node of the PostgreSQL plan of ``statement``, without seq scans."""
+    await connection.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = (await connection.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + statement, parameters)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found = []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        found.append(node)
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+def explainable(sql) -> dict:
+    """Unique statements worth explaining, with a route and parameters for each."""
+    explained = {}
+    for route, statement, parameters in sql.statements:
+        if route in FULL_READ_ROUTES or not statement.lstrip().upper().startswith(EXPLAINED):
+            continue
+        explained.setdefault(statement, (route, parameters))
+    return explained
+
+
+async def test_tour_covers_every_route(app, sql):
+    await tour(sql)
+    assert api_routes(app) - set(SKIPPED_ROUTES) <= sql.requested
+
+
+async def test_router_statements_use_indexes(app, sql):
+    await tour(sql)
+
+    explained = explainable(sql)
+    assert explained
+
+    failures = []
+    async with get_async_engine().connect() as connection:
+        for statement, (route, parameters) in explained.items():
+            scans = await sequential_scans(connection, statement, parameters)
+            if scans:
+                failures.append(f"{route}: full scan of {', '.join(scans)}: "
+                                + " ".join(statement.split()))
+        await connection.rollback()
+    assert not failures, "\n".join(failures)
+
+
+@pytest.mark.skipif(not POSTGRES, reason="needs TEST_DATABASE_URL for PostgreSQL")
+async def test_date_ranges_use_gist_index(app, sql):
+    await tour(sql)
+
+    ranged = {statement: parameters for statement, (_, parameters) in explainable(sql).items()
+              if "tstzrange" in statement}
+    # The from/to listing and the calendar
+    assert len(ranged) >= 2
+
+    async with get_async_engine().connect() as connection:
+        for statement, parameters in ranged.items():
+            indexes = {node.get("Index Name")
+                       for node in await postgres_plan(connection, statement, parameters)}
+            assert "ix_events_time_range" in indexes, statement
+        await connection.rollback()
@@ -0,0 +1,29 @@
+"""No route issues N+1 queries.
+
+The suite runs with the query tracker in raising mode (see conftest), so
+any request that repeats one statement more than twice fails with
+QueryBudgetExceeded. The tour below visits every route with listings of
+several rows, which is where N+1 patterns show up.
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.database import get_async_engine
+from app.core.query_tracker import QueryBudgetExceeded, track_queries
+from app.models import User
+
+from .tour import tour
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_tour_has_no_repeated_statements(sql):
+    await tour(sql)
+
+
+async def test_repeated_statement_raises(app):
+    async with get_async_engine().connect() as connection:
+        with pytest.raises(QueryBudgetExceeded, match="ran 3 times"):
+            with track_queries("n+1", repeat_threshold=2, raise_on_violation=True):
+                for user_id in range(3):
+                    await connection.execute(select(User.name).where(User.id == user_id))
@@ -0,0 +1,37 @@
+"""Rate limits key on the client IP the proxy reports, not one clients choose."""
+import pytest
+
+from app.core.config import settings
+from app.core.ratelimit import register_ip_limiter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def rate_limited(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_CLIENT_IP_HEADER", "X-Forwarded-For")
+    register_ip_limiter.clear()
+    yield
+    register_ip_limiter.clear()
+
+
+async def register(client, i: int, forwarded_for: str):
+    return await client.post("/api/auth/register", headers={"X-Forwarded-For": forwarded_for},
+                             json={"name": "limited", "email": f"limited{i}@example.com",
+                                   "password": "limited-password"})
+
+
+async def test_spoofed_forwarded_for_still_limited(client, rate_limited):
+    # Each request claims a different client in front of the proxy's entry
+    for i in range(settings.REGISTER_BURST_PER_IP):
+        response = await register(client, i, f"10.0.0.{i}, 203.0.113.7")
+        assert response.status_code == 200, response.text
+
+    response = await register(client, 99, "10.0.0.99, 203.0.113.7")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    # Another client behind the same proxy has its own bucket
+    response = await register(client, 100, "203.0.113.8")
+    assert response.status_code == 200
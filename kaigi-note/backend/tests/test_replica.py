@@ -0,0 +1,21 @@
+"""Read routing keeps recent writers on the primary."""
+from app.core.config import settings
+from app.core.replica import OK, ROUTE_RECENT_WRITE, ROUTE_REPLICA, ReplicaMonitor
+
+
+def test_recent_writers_sized_by_their_own_setting():
+    monitor = ReplicaMonitor()
+    assert monitor._recent_writers.maxsize == settings.READ_YOUR_WRITES_MAX_USERS
+
+
+def test_evicted_writer_kept_on_primary_by_header():
+    monitor = ReplicaMonitor(max_recent_writers=2)
+    monitor.status = OK
+    header = monitor.note_write(1)
+    monitor.note_write(2)
+    monitor.note_write(3)
+
+    assert monitor.route(3) == ROUTE_RECENT_WRITE
+    # User 1 was evicted; the header their client echoes still applies
+    assert monitor.route(1) == ROUTE_REPLICA
+    assert monitor.route(1, header) == ROUTE_RECENT_WRITE
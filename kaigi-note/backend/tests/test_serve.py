@@ -0,0 +1,17 @@
+"""Worker count of the production server."""
+from app import serve
+from app.core.config import settings
+
+
+def test_one_worker_per_cpu_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 0)
+    monkeypatch.setattr(serve, "available_cpus", lambda: 1)
+    assert serve.worker_count() == 1
+    monkeypatch.setattr(serve, "available_cpus", lambda: 4)
+    assert serve.worker_count() == 4
+
+
+def test_web_concurrency_overrides(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(serve, "available_cpus", lambda: 1)
+    assert serve.worker_count() == 2
@@ -7,6 +7,7 @@ import {
   getEventParticipants,
   addParticipant,
   removeParticipant,
+  subscribeToChanges,
 } from '../services/events';
 import { getCurrentUser } from '../services/auth';
 import { format } from 'date-fns';
@@ -37,10 +38,24 @@ const EventDetail: React.FC = () => {
   useEffect(() => {
     fetchEventData();
     fetchCurrentUser();
+    let pending: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = subscribeToChanges((change) => {
+      if (change.kind === 'event.deleted') {
+        navigate('/');
+        return;
+      }
+      // One refetch for a burst of changes
+      clearTimeout(pending);
+      pending = setTimeout(() => fetchEventData(false), 300);
+    }, eventId);
+    return () => {
+      clearTimeout(pending);
+      unsubscribe();
+    };
   }, [eventId]);
 
-  const fetchEventData = async (): Promise<void> => {
-    setLoading(true);
+  const fetchEventData = async (showLoading: boolean = true): Promise<void> => {
+    if (showLoading) setLoading(true);
     try {
       const eventData = await getEvent(eventId!);
       setEvent(eventData);
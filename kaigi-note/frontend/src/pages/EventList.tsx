@@ -1,7 +1,7 @@
 // pages/EventList.tsx
-import React, { useState, useEffect, FormEvent } from 'react';
+import React, { useState, useEffect, useRef, FormEvent } from 'react';
 import { Link } from 'react-router-dom';
-import { getEvents } from '../services/events';
+import { getEvents, subscribeToChanges } from '../services/events';
 import { format } from 'date-fns';
 import { ja } from 'date-fns/locale';
 import { Event } from '../types';
@@ -13,12 +13,29 @@ const EventList: React.FC = () => {
   const [keyword, setKeyword] = useState<string>('');
   const [status, setStatus] = useState<string>('');
 
+  // Filters of the last search, reapplied when the list changes elsewhere
+  const searchParams = useRef<Record<string, any>>({});
+
   useEffect(() => {
     fetchEvents();
+    let pending: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = subscribeToChanges(() => {
+      // One refetch for a burst of changes
+      clearTimeout(pending);
+      pending = setTimeout(() => fetchEvents(searchParams.current, false), 300);
+    });
+    return () => {
+      clearTimeout(pending);
+      unsubscribe();
+    };
   }, []);
 
-  const fetchEvents = async (params: Record<string, any> = {}): Promise<void> => {
-    setLoading(true);
+  const fetchEvents = async (
+    params: Record<string, any> = {},
+    showLoading: boolean = true
+  ): Promise<void> => {
+    searchParams.current = params;
+    if (showLoading) setLoading(true);
     try {
       const data = await getEvents(params);
       setEvents(data);
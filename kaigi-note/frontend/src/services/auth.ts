@@ -40,7 +40,11 @@ export const login = async (credentials: UserCredentials): Promise<Token> => {
 // Logout a user
 export const logout = async (): Promise<void> => {
   try {
-    await axios.post(`${API_URL}/api/auth/logout`);
+    // Send the token so the server revokes it
+    const token = getToken();
+    await axios.post(`${API_URL}/api/auth/logout`, null, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {}
+    });
     removeToken();
   } catch (error) {
     console.error('Logout error:', error);
@@ -87,12 +91,20 @@ export const authAxios = axios.create({
 });
 
 // Add auth header to requests
+// Returned by the API after a write; echoing it keeps our reads on the
+// primary database until the read replica has caught up
+const CONSISTENT_READ_HEADER = 'X-Consistent-Read-Until';
+let consistentReadUntil: string | null = null;
+
 authAxios.interceptors.request.use(
   (config: InternalAxiosRequestConfig): InternalAxiosRequestConfig => {
     const token = getToken();
     if (token && config.headers) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (consistentReadUntil && config.headers) {
+      config.headers[CONSISTENT_READ_HEADER] = consistentReadUntil;
+    }
     return config;
   },
   (error: any) => {
@@ -102,7 +114,13 @@ authAxios.interceptors.request.use(
 
 // Handle 401 responses
 authAxios.interceptors.response.use(
-  (response: AxiosResponse): AxiosResponse => response,
+  (response: AxiosResponse): AxiosResponse => {
+    const until = response.headers[CONSISTENT_READ_HEADER.toLowerCase()];
+    if (until) {
+      consistentReadUntil = until;
+    }
+    return response;
+  },
   (error: AxiosError) => {
     if (error.response?.status === 401) {
       removeToken();
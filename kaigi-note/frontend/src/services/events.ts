@@ -1,9 +1,11 @@
 import { AxiosError } from 'axios';
-import { authAxios } from './auth';
+import { authAxios, getToken } from './auth';
 import { 
   Event, 
   EventCreate, 
   EventUpdate, 
+  EventDayCount,
+  ChangeEvent,
   Participant, 
   ParticipantCreate, 
   ParticipantUpdate, 
@@ -26,6 +28,20 @@ export const getEvents = async (params: Record<string, any> = {}): Promise<Event
   }
 };
 
+// Get the number of events on each day of a month (month is 1-12)
+export const getEventCalendar = async (year: number, month: number): Promise<EventDayCount[]> => {
+  try {
+    const response = await authAxios.get<EventDayCount[]>(`${EVENTS_ENDPOINT}/calendar`, {
+      params: { year, month, utc_offset: -new Date(year, month - 1, 1).getTimezoneOffset() },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching event calendar:', error);
+    const axiosError = error as AxiosError<ApiError>;
+    throw axiosError.response?.data || { detail: 'Failed to fetch event calendar' };
+  }
+};
+
 // Get a specific event by ID
 export const getEvent = async (eventId: number | string): Promise<Event> => {
   try {
@@ -128,3 +144,74 @@ export const removeParticipant = async (eventId: number | string, participantId:
     throw axiosError.response?.data || { detail: 'Failed to remove participant' };
   }
 };
+
+// Follow live changes to all events, or to one event's participants.
+// EventSource cannot send the Authorization header, so the server-sent
+// events are read with fetch; the stream is reopened after `retry` ms with
+// Last-Event-ID so that the server can replay what was missed. Returns a
+// function that stops following.
+export const subscribeToChanges = (
+  onChange: (change: ChangeEvent) => void,
+  eventId?: number | string
+): (() => void) => {
+  const controller = new AbortController();
+  const query = eventId !== undefined ? `?event_id=${eventId}` : '';
+  let lastEventId: string | null = null;
+  let retry = 3000;
+
+  const handle = (block: string): void => {
+    let kind = 'message';
+    let data = '';
+    for (const line of block.split('\n')) {
+      const colon = line.indexOf(':');
+      if (colon === 0) continue; // keepalive comment
+      const field = colon < 0 ? line : line.slice(0, colon);
+      const value = colon < 0 ? '' : line.slice(colon + 1).replace(/^ /, '');
+      if (field === 'id') lastEventId = value;
+      else if (field === 'event') kind = value;
+      else if (field === 'data') data += value;
+      else if (field === 'retry' && /^\d+$/.test(value)) retry = Number(value);
+    }
+    if (data) {
+      onChange({ ...JSON.parse(data), kind });
+    }
+  };
+
+  const follow = async (): Promise<void> => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = { Accept: 'text/event-stream' };
+        const token = getToken();
+        if (token) headers.Authorization = `Bearer ${token}`;
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+        const response = await fetch(`${API_URL}${EVENTS_ENDPOINT}/stream${query}`, {
+          headers,
+          signal: controller.signal,
+        });
+        // Not signed in, or the event is gone: nothing to follow
+        if (response.status === 401 || response.status === 404) return;
+        if (response.ok && response.body) {
+          const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+          let buffer = '';
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value.replace(/\r\n?/g, '\n');
+            let end;
+            while ((end = buffer.indexOf('\n\n')) >= 0) {
+              handle(buffer.slice(0, end));
+              buffer = buffer.slice(end + 2);
+            }
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        console.error('Change stream interrupted:', error);
+      }
+      await new Promise((resolve) => setTimeout(resolve, retry));
+    }
+  };
+
+  follow();
+  return () => controller.abort();
+};
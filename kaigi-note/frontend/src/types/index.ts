@@ -27,6 +27,8 @@ export interface Event {
   content: string | null;
   status: string;
   total_cost: number;
+  max_participants: number | null;
+  participant_count: number;
   created_at: string;
   updated_at: string;
 }
@@ -38,6 +40,7 @@ export interface EventCreate {
   content?: string;
   status?: string;
   total_cost?: number;
+  max_participants?: number | null;
 }
 
 export interface EventUpdate {
@@ -47,6 +50,21 @@ export interface EventUpdate {
   content?: string;
   status?: string;
   total_cost?: number;
+  max_participants?: number | null;
+}
+
+export interface EventDayCount {
+  date: string;
+  count: number;
+}
+
+// A change from the live feed; "reset" means changes may have been missed
+export interface ChangeEvent {
+  kind: string;
+  event_id?: number;
+  participant_id?: number;
+  enrollment_status?: string;
+  count?: number;
 }
 
 // Participant types
@@ -55,6 +73,7 @@ export interface Participant {
   event_id: number;
   user_id: number;
   paid_amount: number;
+  enrollment_status: 'confirmed' | 'waitlisted';
   created_at: string;
   updated_at: string;
 }
@@ -76,6 +95,7 @@ export interface ParticipantUpdate {
 export interface Token {
   access_token: string;
   token_type: string;
+  refresh_token?: string;
 }
 
 // API response types